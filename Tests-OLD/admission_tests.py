@@ -0,0 +1,44 @@
+import pytest
+from admission.admission_controller import AdmissionController, LoadSheddingError
+from admission.concurrency_limits import AIMDLimit
+from strategies.round_robin import RoundRobinStrategy
+
+
+def test_aimd_limit_grows_and_backs_off():
+    limit = AIMDLimit(initial_limit=10, latency_threshold=0.5)
+
+    # Szybkie zapytania przy wykorzystanym limicie zwiększają go o 1
+    assert limit.update(0.01, inflight=10) == 11
+    # Wolne zapytanie zmniejsza limit multiplikatywnie
+    assert limit.update(1.0, inflight=10) == 9
+    # Nieudane zapytanie również zmniejsza limit
+    assert limit.update(0.01, inflight=1, dropped=True) == 8
+
+
+def test_strategy_only_sees_backends_with_spare_permits():
+    databases = [
+        {"Name": "db1", "ConnectionString": "mock_conn1"},
+        {"Name": "db2", "ConnectionString": "mock_conn2"}
+    ]
+    controller = AdmissionController(initial_limit=1, queue_timeout=0)
+    strategy = RoundRobinStrategy()
+
+    assert controller.acquire(databases, strategy.select_database)["Name"] == "db1"
+    # db1 nie ma wolnych miejsc, więc strategia dostaje tylko db2
+    assert controller.acquire(databases, strategy.select_database)["Name"] == "db2"
+
+    # Brak wolnych miejsc - zapytanie zostaje odrzucone
+    with pytest.raises(LoadSheddingError):
+        controller.acquire(databases, strategy.select_database)
+
+    controller.release("db1", latency=0.01)
+    assert controller.acquire(databases, strategy.select_database)["Name"] == "db1"
+
+
+def test_full_queue_sheds_immediately():
+    databases = [{"Name": "db1", "ConnectionString": "mock_conn1"}]
+    controller = AdmissionController(initial_limit=1, max_queue_size=0, queue_timeout=10)
+
+    controller.acquire(databases, lambda dbs: dbs[0])
+    with pytest.raises(LoadSheddingError):
+        controller.acquire(databases, lambda dbs: dbs[0])
@@ -0,0 +1,96 @@
+import os
+from collections import Counter
+from unittest.mock import patch, MagicMock
+import pytest
+from loadbalancer import LoadBalancer
+from strategies.least_loaded import LeastLoadedStrategy
+from strategies.random_strategy import RandomStrategy
+from strategies.weighted import WeightedStrategy
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def names(selected):
+    return Counter(db["Name"] for db in selected)
+
+
+def make_connection():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = lambda query, params: setattr(cursor, "last_params", params)
+    cursor.fetchall.side_effect = lambda: [cursor.last_params]
+    return connection
+
+
+def test_weighted_select_many_follows_weights():
+    databases = [{"Name": "db1", "Weight": 3}, {"Name": "db2", "Weight": 1}]
+
+    counts = names(WeightedStrategy().select_many(databases, 40000))
+
+    assert sum(counts.values()) == 40000
+    assert 2.7 < counts["db1"] / counts["db2"] < 3.3
+
+
+def test_weighted_rejects_all_zero_weights():
+    databases = [{"Name": "db1", "Weight": 0}, {"Name": "db2", "Weight": 0}]
+    strategy = WeightedStrategy()
+
+    # Błąd konfiguracji zamiast wyjątku z głębi random/NumPy
+    with pytest.raises(ValueError):
+        strategy.select_database(databases)
+    with pytest.raises(ValueError):
+        strategy.select_many(databases, 10)
+    with pytest.raises(ValueError):
+        strategy.select_many([{"Name": "db1", "Weight": -1}, {"Name": "db2", "Weight": 2}], 10)
+
+
+def test_random_select_many_uses_every_database():
+    databases = [{"Name": f"db{i}"} for i in range(1, 5)]
+
+    counts = names(RandomStrategy().select_many(databases, 4000))
+
+    assert set(counts) == {"db1", "db2", "db3", "db4"}
+    assert sum(counts.values()) == 4000
+
+
+def test_least_loaded_select_many_fills_least_loaded_first():
+    databases = [{"Name": "db1"}, {"Name": "db2"}, {"Name": "db3"}]
+    strategy = LeastLoadedStrategy()
+    for name, active in (("db1", 0), ("db2", 4), ("db3", 10)):
+        strategy.update_load(name, {"active_backends": active, "connection_saturation": 0.1})
+
+    # db1 dogania db2 (4 zapytania), pozostałe 4 dzielą się po równo
+    assert names(strategy.select_many(databases, 8)) == {"db1": 6, "db2": 2}
+
+    # Bez NumPy wynik jest taki sam jak przy pojedynczych wyborach
+    fallback = LeastLoadedStrategy()
+    fallback.loads = dict(strategy.loads)
+    with patch("strategies.least_loaded.np", None):
+        assert names(fallback.select_many(databases, 8)) == {"db1": 6, "db2": 2}
+
+
+def test_least_loaded_select_many_breaks_ties_like_single_calls():
+    databases = [{"Name": "db1"}, {"Name": "db2"}]
+    strategy = LeastLoadedStrategy()
+    strategy.update_load("db1", {"active_backends": 2, "connection_saturation": 0.1})
+    strategy.update_load("db2", {"active_backends": 0, "connection_saturation": 0.1})
+    fallback = LeastLoadedStrategy()
+    fallback.loads = dict(strategy.loads)
+
+    # Po wyrównaniu obciążeń reszta trafia do bazy wymienionej jako pierwsza
+    assert names(strategy.select_many(databases, 5)) == {"db2": 3, "db1": 2}
+    with patch("strategies.least_loaded.np", None):
+        assert names(fallback.select_many(databases, 5)) == {"db2": 3, "db1": 2}
+
+
+@patch("psycopg2.connect")
+def test_execute_select_many_groups_queries_per_database(mock_connect):
+    mock_connect.side_effect = lambda **kwargs: make_connection()
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    queries = [("SELECT * FROM users WHERE id = %s;", (i,)) for i in range(10)]
+
+    results = load_balancer.execute_select_many(queries)
+
+    # Jedno połączenie na bazę, wyniki w kolejności zapytań
+    assert mock_connect.call_count == 4
+    assert results == [[(i,)] for i in range(10)]
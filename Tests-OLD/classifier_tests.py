@@ -0,0 +1,86 @@
+import os
+from unittest.mock import patch
+import pytest
+from loadbalancer import LoadBalancer
+from routing.sql_classifier import SQLClassifier, split_statements, READ, WRITE, DDL, TRANSACTION, SESSION
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def test_classify_statements():
+    classifier = SQLClassifier()
+
+    assert classifier.classify("SELECT * FROM users WHERE id = %s;") == (READ, "SELECT", ("users",))
+    assert classifier.classify("/* komentarz */ (SELECT 1)").kind == READ
+    assert classifier.classify("SELECT 'DELETE FROM users'").kind == READ
+    assert classifier.classify("INSERT INTO users (name, email) VALUES (%s, %s);").kind == WRITE
+    assert classifier.classify("WITH deleted AS (DELETE FROM users RETURNING *) SELECT * FROM deleted").kind == WRITE
+    assert classifier.classify("CREATE TABLE IF NOT EXISTS users (id SERIAL PRIMARY KEY);").kind == DDL
+    assert classifier.classify("BEGIN").kind == TRANSACTION
+    assert classifier.classify("SET extra_float_digits = 3").kind == SESSION
+
+
+def test_select_with_side_effects_is_a_write():
+    classifier = SQLClassifier()
+
+    # Funkcje zmieniające stan muszą trafić do wszystkich baz, nie do jednej repliki
+    assert classifier.classify("SELECT nextval('users_id_seq')").kind == WRITE
+    assert classifier.classify(
+        "SELECT setval(pg_get_serial_sequence('users', 'id'), COALESCE(MAX(id), 0), true) FROM users;").kind == WRITE
+    assert classifier.classify("SELECT pg_advisory_lock(1)").kind == WRITE
+    assert classifier.classify("SELECT pg_try_advisory_xact_lock(1)").kind == WRITE
+    assert classifier.classify("SELECT set_config('search_path', 'app', false)").kind == WRITE
+    assert classifier.classify("SELECT lo_unlink(42)").kind == WRITE
+    assert classifier.classify("WITH ids AS (SELECT nextval('s') AS id) SELECT id FROM ids").kind == WRITE
+    # Nazwa funkcji w literale albo jako kolumna nie zmienia klasyfikacji
+    assert classifier.classify("SELECT 'nextval(1)', nextval_count FROM stats").kind == READ
+    assert classifier.classify("SELECT currval('users_id_seq')").kind == READ
+
+
+def test_extract_tables():
+    classifier = SQLClassifier()
+
+    assert classifier.classify("SELECT * FROM users u JOIN orders o ON o.user_id = u.id").tables == (
+        "users", "orders")
+    assert classifier.classify("UPDATE public.users SET name = %s FROM a, \"Mixed\" WHERE true").tables == (
+        "public.users", "a", "Mixed")
+    assert classifier.classify(
+        "INSERT INTO users (id) VALUES (1) ON CONFLICT (id) DO UPDATE SET id = EXCLUDED.id").tables == ("users",)
+    assert classifier.classify("WITH recent AS (SELECT * FROM orders) SELECT * FROM recent").tables == ("orders",)
+    # Słowa kluczowe po nazwie tabeli nie są traktowane jak alias
+    assert classifier.classify("SELECT * INTO t2 FROM users").tables == ("t2", "users")
+    assert classifier.classify("INSERT INTO archive SELECT * FROM users").tables == ("archive", "users")
+
+
+def test_classification_is_cached():
+    classifier = SQLClassifier(cache_size=2)
+    classifier.classify("SELECT 1")
+    classifier.classify("SELECT 1")
+
+    assert classifier.cache_info().hits == 1
+
+
+def test_split_statements_ignores_literals_and_comments():
+    sql = "SELECT 1; INSERT INTO users (name) VALUES ('a;b'); -- komentarz;\nSELECT $$x;y$$;"
+
+    assert split_statements(sql) == [
+        "SELECT 1",
+        "INSERT INTO users (name) VALUES ('a;b')",
+        "-- komentarz;\nSELECT $$x;y$$",
+    ]
+
+
+@patch("loadbalancer.LoadBalancer.execute_non_select_query", return_value=1)
+@patch("loadbalancer.LoadBalancer.execute_select", return_value=[(1, "Alice Johnson", "alice@example.com")])
+def test_execute_routes_by_statement_kind(mock_select, mock_write):
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    assert load_balancer.execute("SELECT * FROM users WHERE id = %s;", (1,)) == [(1, "Alice Johnson", "alice@example.com")]
+    assert load_balancer.execute("DELETE FROM users WHERE id = %s;", (1,)) == 1
+    mock_select.assert_called_once_with("SELECT * FROM users WHERE id = %s;", (1,))
+    mock_write.assert_called_once_with("DELETE FROM users WHERE id = %s;", (1,))
+    assert load_balancer.table_access[("users", READ)] == 1
+
+    # Polecenia transakcyjne nie mają sensu przy osobnym połączeniu na każde zapytanie
+    with pytest.raises(ValueError):
+        load_balancer.execute("BEGIN")
@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+import psycopg2
+import pytest
+from loadbalancer import LoadBalancer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_concurrent_writes_share_one_transaction(mock_connect, mock_reset):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.rowcount = 1
+    mock_connect.return_value = connection
+
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.enable_write_coalescing(window=0.5, max_batch_size=8)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda i: load_balancer.execute_non_select_query("DELETE FROM users WHERE id = %s;", (i,)),
+                range(8)))
+    finally:
+        load_balancer.disable_write_coalescing()
+
+    # Osiem zapytań trafia do jednej transakcji na każdej z czterech baz
+    assert results == [1] * 8
+    assert connection.commit.call_count == 4
+    mock_reset.assert_called_once()
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_failing_statement_gets_its_own_error(mock_connect, mock_reset):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.rowcount = 1
+
+    def execute(query, params=None):
+        if query.startswith("INSERT"):
+            raise psycopg2.Error("duplicate key")
+
+    cursor.execute.side_effect = execute
+    mock_connect.return_value = connection
+
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.enable_write_coalescing(window=0.5, max_batch_size=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ok = executor.submit(load_balancer.write_coalescer.submit, "DELETE FROM users WHERE id = %s;", (1,))
+            failed = executor.submit(load_balancer.write_coalescer.submit, "INSERT INTO users VALUES (%s);", (1,))
+            # Błędne zapytanie nie wpływa na wynik pozostałych zapytań z tej samej paczki
+            assert ok.result() == 1
+            with pytest.raises(psycopg2.Error):
+                failed.result()
+    finally:
+        load_balancer.disable_write_coalescing()
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_parameter_error_stays_with_its_caller(mock_connect, mock_reset):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.rowcount = 1
+
+    def execute(query, params=None):
+        if params is not None and query.count("%s") != len(params):
+            raise IndexError("tuple index out of range")
+
+    cursor.execute.side_effect = execute
+    mock_connect.return_value = connection
+
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.enable_write_coalescing(window=0.5, max_batch_size=2)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ok = executor.submit(load_balancer.write_coalescer.submit, "DELETE FROM users WHERE id = %s;", (1,))
+            failed = executor.submit(load_balancer.write_coalescer.submit, "DELETE FROM users WHERE id = %s;", ())
+            # Błąd formatowania parametrów dotyczy tylko jednego wywołującego
+            assert ok.result() == 1
+            with pytest.raises(IndexError):
+                failed.result()
+    finally:
+        load_balancer.disable_write_coalescing()
+    assert connection.commit.call_count == 4
+
+
+@patch("loadbalancer.LoadBalancer.write_databases")
+def test_flush_error_resolves_every_caller(mock_write_databases):
+    mock_write_databases.side_effect = RuntimeError("membership error")
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.enable_write_coalescing(window=0.01)
+    try:
+        with pytest.raises(RuntimeError):
+            load_balancer.write_coalescer.submit("DELETE FROM users WHERE id = %s;", (1,))
+    finally:
+        load_balancer.disable_write_coalescing()
+
+
+def test_statement_queued_behind_stop_is_rejected():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.enable_write_coalescing(window=0.01)
+    coalescer = load_balancer.write_coalescer
+    future = Future()
+
+    # Instrukcja za znacznikiem zatrzymania nie może czekać w nieskończoność
+    coalescer.queue.put(None)
+    coalescer.queue.put(("DELETE FROM users WHERE id = %s;", (1,), future, None))
+    coalescer.thread.join(5)
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        future.result(timeout=1)
+    coalescer.running = False
+    with pytest.raises(RuntimeError, match="stopped"):
+        coalescer.submit("DELETE FROM users WHERE id = %s;", (1,))
@@ -0,0 +1,75 @@
+from unittest.mock import patch, MagicMock
+from observer.base_observer import Observer
+from observer.health_checker import HealthChecker
+from strategies.least_loaded import LeastLoadedStrategy
+
+
+class RecordingObserver(Observer):
+    def __init__(self):
+        self.statuses = []
+        self.loads = []
+
+    def update(self, database_name, status):
+        self.statuses.append((database_name, status))
+
+    def update_load(self, database_name, load):
+        self.loads.append((database_name, load))
+
+
+@patch("psycopg2.connect")
+def test_probe_reuses_connection_and_reports_load(mock_connect):
+    connection = MagicMock()
+    connection.closed = 0
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.side_effect = [(1,), (3, 10, 100, 500), (1,), (4, 12, 100, 600)]
+    mock_connect.return_value = connection
+
+    databases = [{"Name": "db1", "ConnectionString": "Host=localhost;Port=5432;Database=database1;"}]
+    health_checker = HealthChecker(databases, check_interval=10)
+    observer = RecordingObserver()
+    health_checker.add_observer(observer)
+
+    health_checker.initial_health_check()
+    health_checker.check_health()
+    health_checker.stop()
+
+    # Połączenie sondy jest otwierane tylko raz
+    assert mock_connect.call_count == 1
+    assert observer.statuses == [("db1", "healthy")]
+    assert observer.loads[0][1]["active_backends"] == 3
+    assert observer.loads[1][1]["connection_saturation"] == 0.12
+    assert observer.loads[1][1]["transaction_rate"] > 0
+
+
+def test_least_loaded_strategy_avoids_hot_databases():
+    databases = [
+        {"Name": "db1", "ConnectionString": "mock_conn1"},
+        {"Name": "db2", "ConnectionString": "mock_conn2"},
+        {"Name": "db3", "ConnectionString": "mock_conn3"}
+    ]
+    strategy = LeastLoadedStrategy()
+    strategy.update_load("db1", {"active_backends": 1, "connection_saturation": 0.95})
+    strategy.update_load("db2", {"active_backends": 5, "connection_saturation": 0.2})
+    strategy.update_load("db3", {"active_backends": 3, "connection_saturation": 0.2})
+
+    # db1 jest nasycona, więc wybierana jest najmniej obciążona z pozostałych
+    assert strategy.select_database(databases)["Name"] == "db3"
+    assert strategy.select_database(databases)["Name"] == "db3"
+    assert strategy.select_database(databases)["Name"] == "db2"
+    strategy.release_connection("db3")
+    assert strategy.select_database(databases)["Name"] == "db3"
+
+
+def test_least_loaded_does_not_count_sampled_queries_twice():
+    databases = [{"Name": "db1"}, {"Name": "db2"}]
+    strategy = LeastLoadedStrategy()
+    strategy.update_load("db1", {"active_backends": 0})
+    strategy.update_load("db2", {"active_backends": 1})
+    for _ in range(3):
+        strategy.select_database(databases)
+
+    # Nowa próbka zawiera już zapytania wysłane wcześniej, więc licznik zaczyna się od zera
+    strategy.update_load("db1", {"active_backends": 2})
+    strategy.update_load("db2", {"active_backends": 3})
+    assert strategy.score("db1") == (False, 2)
+    assert strategy.score("db2") == (False, 3)
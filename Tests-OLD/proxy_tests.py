@@ -0,0 +1,287 @@
+import asyncio
+import os
+import struct
+import threading
+from collections import namedtuple
+from unittest.mock import MagicMock
+import psycopg2
+import pytest
+from admission.admission_controller import LoadSheddingError
+from loadbalancer import LoadBalancer
+from proxy.pg_proxy import PostgresProxy, ProxySession, ProxyError, to_pyformat, PROTOCOL_VERSION
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+Column = namedtuple("Column", ["name", "type_code"])
+
+
+class MemoryWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def message(message_type, payload=b""):
+    return message_type + struct.pack("!I", len(payload) + 4) + payload
+
+
+def startup_message(user="user1"):
+    payload = struct.pack("!I", PROTOCOL_VERSION) + b"user\x00" + user.encode() + b"\x00\x00"
+    return struct.pack("!I", len(payload) + 4) + payload
+
+
+def query(sql):
+    return message(b"Q", sql.encode() + b"\x00")
+
+
+def parse_responses(data):
+    responses = []
+    while data:
+        length = struct.unpack("!I", data[1:5])[0]
+        responses.append((data[:1], bytes(data[5:1 + length])))
+        data = data[1 + length:]
+    return responses
+
+
+def make_connection(rows=((b"1",),), description=(Column("id", 23),)):
+    connection = MagicMock()
+    connection.closed = 0
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.description = description
+    cursor.fetchall.return_value = list(rows)
+    cursor.statusmessage = "SELECT 1"
+    return connection
+
+
+def make_proxy(password=None, strategy_type="round_robin"):
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", strategy_type=strategy_type)
+    proxy = PostgresProxy(load_balancer, password=password)
+    proxy.pool = MagicMock()
+    proxy.pool.get.side_effect = lambda db: make_connection()
+    return proxy
+
+
+def types_and_payloads(proxy, *messages):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"".join(messages))
+        reader.feed_eof()
+        writer = MemoryWriter()
+        await ProxySession(proxy, reader, writer).run()
+        return writer.data
+
+    return parse_responses(asyncio.run(run()))
+
+
+def response_types(proxy, *messages):
+    return [response_type for response_type, _ in types_and_payloads(proxy, *messages)]
+
+
+def error_codes(responses):
+    codes = []
+    for response_type, payload in responses:
+        if response_type == b"E":
+            fields = {field[:1]: field[1:] for field in payload.split(b"\x00") if field}
+            codes.append(fields[b"C"].decode())
+    return codes
+
+
+def test_to_pyformat_converts_placeholders():
+    sql = "SELECT * FROM users WHERE name LIKE 'A%' AND id = $1 OR id = $1"
+
+    assert to_pyformat(sql) == "SELECT * FROM users WHERE name LIKE 'A%%' AND id = %(p1)s OR id = %(p1)s"
+
+
+def test_startup_without_password_reports_ready():
+    types = response_types(make_proxy(), startup_message(), message(b"X"))
+
+    assert types[0] == b"R" and types[-1] == b"Z"
+    assert b"K" in types and b"S" in types
+
+
+def test_startup_rejects_wrong_password():
+    responses = types_and_payloads(make_proxy(password="secret"), startup_message(), message(b"p", b"wrong\x00"))
+
+    assert responses[0] == (b"R", struct.pack("!I", 3))
+    assert error_codes(responses) == ["28P01"]
+
+
+def test_simple_query_frames_every_statement():
+    types = response_types(make_proxy(), startup_message(), query("SELECT 1; SELECT 2;"), message(b"X"))
+
+    # Każda instrukcja ma własny opis wierszy, dane i znacznik zakończenia, a całość kończy jeden ReadyForQuery
+    assert types[-7:] == [b"T", b"D", b"C", b"T", b"D", b"C", b"Z"]
+
+
+def test_extended_protocol_parse_bind_describe_execute_sync():
+    proxy = make_proxy()
+    bind = b"\x00\x00" + struct.pack("!HH", 0, 1) + struct.pack("!i", 1) + b"7" + struct.pack("!H", 0)
+    types = response_types(
+        proxy, startup_message(),
+        message(b"P", b"\x00SELECT * FROM users WHERE id = $1\x00" + struct.pack("!H", 0)),
+        message(b"B", bind),
+        message(b"D", b"P\x00"),
+        message(b"E", b"\x00" + struct.pack("!I", 0)),
+        message(b"S"),
+        message(b"X"))
+
+    assert types[-6:] == [b"1", b"2", b"T", b"D", b"C", b"Z"]
+    # Describe i Execute portalu korzystają z jednego wykonania zapytania
+    assert proxy.pool.get.call_count == 1
+
+
+def test_error_skips_messages_until_sync():
+    types = response_types(
+        make_proxy(), startup_message(),
+        message(b"B", b"\x00missing\x00" + struct.pack("!HHH", 0, 0, 0)),
+        message(b"E", b"\x00" + struct.pack("!I", 0)),
+        message(b"S"),
+        query("SELECT 1;"),
+        message(b"X"))
+
+    # Po błędzie Execute jest pomijany, Sync przywraca sesję
+    assert types[-6:] == [b"E", b"Z", b"T", b"D", b"C", b"Z"]
+
+
+def test_transaction_is_pinned_and_committed_on_every_database():
+    proxy = make_proxy()
+    connections = []
+
+    def get(db):
+        connection = make_connection()
+        connections.append(connection)
+        return connection
+
+    proxy.pool.get.side_effect = get
+    types = response_types(proxy, startup_message(), query("BEGIN;"), query("INSERT INTO users VALUES (1);"),
+                           query("SELECT 1;"), query("COMMIT;"), message(b"X"))
+
+    assert b"E" not in types
+    assert len(connections) == 4
+    for connection in connections:
+        connection.commit.assert_called_once()
+
+
+def test_load_shedding_is_reported_and_session_continues():
+    proxy = make_proxy()
+    proxy.load_balancer.admission_controller = MagicMock()
+    proxy.load_balancer.admission_controller.acquire.side_effect = [LoadSheddingError("no capacity"), {
+        "Name": "db1", "ConnectionString": "Host=localhost;"}]
+
+    responses = types_and_payloads(proxy, startup_message(), query("SELECT 1;"), query("SELECT 1;"), message(b"X"))
+
+    assert error_codes(responses) == ["53300"]
+    assert [t for t, _ in responses][-4:] == [b"T", b"D", b"C", b"Z"]
+
+
+def test_unreachable_backend_releases_the_connection_count():
+    proxy = make_proxy(strategy_type="least_connections")
+    proxy.pool.get.side_effect = ProxyError("could not connect", "08006")
+
+    responses = types_and_payloads(proxy, startup_message(), query("SELECT 1;"), message(b"X"))
+
+    assert error_codes(responses) == ["08006"]
+    assert set(proxy.load_balancer.strategy.connections_count.values()) == {0}
+    proxy.pool.put.assert_not_called()
+
+
+def test_unexpected_error_is_reported_instead_of_disconnecting():
+    proxy = make_proxy()
+    proxy.pool.get.side_effect = lambda db: (_ for _ in ()).throw(KeyError("boom"))
+
+    responses = types_and_payloads(proxy, startup_message(), query("SELECT 1;"), message(b"X"))
+
+    assert error_codes(responses) == ["XX000"]
+    assert responses[-1][0] == b"Z"
+
+
+def test_session_statements_are_fanned_out_or_rejected():
+    proxy = make_proxy()
+    connections = []
+
+    def get(db):
+        connection = make_connection(description=None)
+        connections.append(connection)
+        return connection
+
+    proxy.pool.get.side_effect = get
+    responses = types_and_payloads(
+        proxy, startup_message(), query("SET search_path = public;"), query("SET ROLE admin;"),
+        query("RESET ALL;"), query("DISCARD ALL;"), query("NOTIFY events;"),
+        query("PREPARE ins AS INSERT INTO users VALUES ($1);"), query("EXECUTE ins(1);"),
+        query("COMMIT PREPARED 'lb-1';"), message(b"X"))
+
+    # Poza transakcją SET/RESET/DISCARD są odrzucane, NOTIFY trafia do wszystkich baz
+    assert error_codes(responses) == ["0A000"] * 7
+    assert len(connections) == 4
+
+
+def test_connect_time_parameters_are_acknowledged():
+    proxy = make_proxy()
+
+    responses = types_and_payloads(
+        proxy, startup_message(), query("SET extra_float_digits = 3;"), query("SET application_name TO 'app';"),
+        query("SET client_encoding = 'UTF8';"), query("SET client_encoding = 'LATIN1';"), message(b"X"))
+
+    # Tylko parametry wysyłane przez sterowniki przy połączeniu są potwierdzane bez wykonania
+    assert error_codes(responses) == ["0A000"]
+    assert [payload for t, payload in responses if t == b"C"] == [b"SET\x00"] * 3
+    proxy.pool.get.assert_not_called()
+
+
+def test_set_inside_transaction_runs_on_every_pinned_connection():
+    proxy = make_proxy()
+    connections = []
+
+    def get(db):
+        connection = make_connection(description=None)
+        connections.append(connection)
+        return connection
+
+    proxy.pool.get.side_effect = get
+    responses = types_and_payloads(
+        proxy, startup_message(), query("BEGIN;"), query("SET LOCAL statement_timeout = '1s';"),
+        query("COMMIT;"), query("BEGIN;"), query("SET search_path = app;"), query("COMMIT;"), message(b"X"))
+
+    assert error_codes(responses) == []
+    executed = [[c.args[0] for c in connection.cursor.return_value.__enter__.return_value.execute.call_args_list]
+                for connection in connections]
+    # SET LOCAL trafia do każdej przypiętej bazy i znika z commitem
+    assert all(statements == ["SET LOCAL statement_timeout = '1s'"] for statements in executed[:4])
+    # Zwykły SET jest cofany przed zwróceniem połączeń do puli
+    assert all(statements == ["SET search_path = app", "RESET ALL;"] for statements in executed[4:])
+    assert len(executed) == 8
+
+
+@pytest.mark.skipif(not os.environ.get("PROXY_LIVE_TEST"), reason="set PROXY_LIVE_TEST=1 with the Docker databases up")
+def test_proxy_against_local_databases():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    proxy = PostgresProxy(load_balancer, port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def serve():
+        proxy.server = await asyncio.start_server(proxy.handle_client, "127.0.0.1", 0)
+        started.set()
+        await proxy.server.serve_forever()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    started.wait(5)
+    port = proxy.server.sockets[0].getsockname()[1]
+    try:
+        conn = psycopg2.connect(host="127.0.0.1", port=port, user="user1", dbname="database1")
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT %s::int + 1;", (1,))
+            assert cursor.fetchone() == (2,)
+        conn.close()
+    finally:
+        loop.call_soon_threadsafe(proxy.server.close)
+        proxy.close()
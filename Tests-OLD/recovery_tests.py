@@ -0,0 +1,60 @@
+import os
+import time
+from unittest.mock import patch
+from loadbalancer import LoadBalancer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def active_names(load_balancer):
+    return [db["Name"] for db in load_balancer.active_databases]
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("synchronization.sync_engine.SyncEngine.synchronize_all")
+def test_rejoining_database_catches_up_before_serving_reads(mock_sync, mock_reset):
+    mock_sync.side_effect = [
+        [{"table": "users", "source": "db2", "synchronized": ["db1"], "failed": [], "rows": 10}],
+        [{"table": "users", "source": "db2", "synchronized": [], "failed": [], "rows": 0}],
+    ]
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.update("db1", "unhealthy")
+
+    with patch.object(load_balancer.recovery_worker, "schedule") as mock_schedule:
+        load_balancer.update("db1", "healthy")
+
+        # Baza nadrabiająca zaległości dostaje zapisy, ale nie odczyty
+        assert "db1" not in active_names(load_balancer)
+        assert "db1" in [db["Name"] for db in load_balancer.write_databases()]
+        mock_schedule.assert_called_once_with("db1")
+
+    load_balancer.recovery_worker._recover("db1")
+
+    # Po zgodności skrótów baza wraca do puli odczytów
+    assert "db1" in active_names(load_balancer)
+    assert load_balancer.catching_up_databases == []
+    assert mock_sync.call_count == 2
+    assert mock_sync.call_args.kwargs["target_databases"][0]["Name"] == "db1"
+
+
+@patch("synchronization.sync_engine.SyncEngine.synchronize_all")
+def test_recovery_is_cancelled_when_database_fails_again(mock_sync):
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    load_balancer.update("db1", "unhealthy")
+    with patch.object(load_balancer.recovery_worker, "schedule"):
+        load_balancer.update("db1", "healthy")
+    load_balancer.update("db1", "unhealthy")
+
+    load_balancer.recovery_worker._recover("db1")
+
+    mock_sync.assert_not_called()
+    assert "db1" not in active_names(load_balancer)
+
+
+def test_throttle_limits_rows_per_second():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    started = time.monotonic()
+
+    load_balancer._throttle(50, started, max_rows_per_second=500)
+
+    assert time.monotonic() - started >= 0.09
@@ -0,0 +1,41 @@
+import random
+from simulation.simulator import Simulator, Backend, ArrivalProcess, ServiceTime, Fault
+from strategies.least_connections import LeastConnectionsStrategy
+from strategies.round_robin import RoundRobinStrategy
+
+
+def make_simulator(strategy, backends, requests=20000, faults=(), rate=1000, service_mean=0.002):
+    return Simulator(strategy, backends, ArrivalProcess(rate, random.Random(1)),
+                     ServiceTime("exponential", service_mean, random.Random(2)), requests, faults)
+
+
+def test_round_robin_spreads_requests_evenly():
+    backends = [Backend(f"db{i}", capacity=2) for i in range(1, 5)]
+
+    report = make_simulator(RoundRobinStrategy(), backends).run()
+
+    assert report["completed"] == 20000
+    assert [stats["completed"] for stats in report["backends"].values()] == [5000] * 4
+    # Obciążenie ~ rate * średni czas obsługi / (liczba baz * pojemność) = 0.25
+    for stats in report["backends"].values():
+        assert 0.2 < stats["utilization"] < 0.3
+    assert report["latency"]["p50"] <= report["latency"]["p99"] <= report["latency"]["max"]
+
+
+def test_failed_backend_stops_receiving_requests():
+    backends = [Backend("db1", capacity=2), Backend("db2", capacity=2)]
+    simulator = make_simulator(RoundRobinStrategy(), backends, faults=[Fault("db2", 5.0, 100.0)])
+
+    report = simulator.run()
+
+    # Po awarii wszystkie żądania trafiają do db1
+    assert report["backends"]["db2"]["completed"] < 6000
+    assert report["completed"] + report["backends"]["db2"]["failed"] == 20000
+
+
+def test_least_connections_avoids_slow_backend():
+    backends = [Backend("db1", capacity=2), Backend("db2", capacity=2, speed=0.25)]
+
+    report = make_simulator(LeastConnectionsStrategy(), backends, rate=800).run()
+
+    assert report["backends"]["db1"]["completed"] > 2 * report["backends"]["db2"]["completed"]
@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+from loadbalancer import LoadBalancer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def test_tables_are_ordered_parents_first():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    dependencies = {
+        "orders": {"users", "products"},
+        "order_items": {"orders", "products"},
+        "users": set(),
+        "products": set(),
+        "audit": set(),
+    }
+
+    layers = load_balancer.sync_engine.order_tables(dependencies)
+
+    # Tabele niezależne trafiają do jednej warstwy i mogą być synchronizowane równolegle
+    assert layers == [["audit", "products", "users"], ["orders"], ["order_items"]]
+
+
+def test_foreign_key_cycle_ends_in_last_layer():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    dependencies = {"a": {"b"}, "b": {"a"}, "c": set()}
+
+    layers = load_balancer.sync_engine.order_tables(dependencies)
+
+    assert layers == [["c"], ["a", "b"]]
+
+
+@patch("loadbalancer.LoadBalancer.synchronize_tables")
+@patch("synchronization.sync_engine.SyncEngine.discover_schema")
+def test_synchronize_all_uses_primary_keys_and_reports_each_table(mock_schema, mock_sync):
+    mock_schema.return_value = (
+        ["users", "orders", "logs"],
+        {"users": ["id"], "orders": ["user_id", "id"]},
+        {"users": set(), "orders": {"users"}, "logs": set()},
+    )
+    mock_sync.side_effect = lambda table, **kwargs: (
+        None if table == "logs" else {"source": "db1", "synchronized": ["db2"], "failed": [], "rows": 5})
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    reports = load_balancer.sync_engine.synchronize_all()
+
+    keys = {call.args[0]: call.kwargs["key_columns"] for call in mock_sync.call_args_list}
+    assert keys == {"users": ["id"], "orders": ["user_id", "id"], "logs": []}
+    # Tabela nadrzędna jest synchronizowana przed tabelą, która się do niej odwołuje
+    assert [report["table"] for report in reports].index("users") < \
+        [report["table"] for report in reports].index("orders")
+    statuses = {report["table"]: report["status"] for report in reports}
+    assert statuses == {"users": "ok", "orders": "ok", "logs": "failed"}
@@ -0,0 +1,130 @@
+import os
+from unittest.mock import patch, MagicMock
+from psycopg2 import sql
+from loadbalancer import LoadBalancer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def render(composable):
+    if isinstance(composable, sql.Composed):
+        return "".join(render(part) for part in composable.seq)
+    if isinstance(composable, sql.Identifier):
+        return ".".join(f'"{name}"' for name in composable.strings)
+    return composable.string
+
+
+def test_elect_reference_database_majority():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    digests = {
+        "db1": ("aaa", 10, 10),
+        "db2": ("bbb", 12, 12),
+        "db3": ("aaa", 10, 10),
+    }
+
+    # Większość baz ma ten sam skrót, więc wygrywa grupa "aaa" (pierwsza nazwa alfabetycznie)
+    assert load_balancer._elect_reference_database(digests) == "db1"
+
+
+def test_elect_reference_database_without_majority():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    digests = {
+        "db1": ("aaa", 10, 10),
+        "db2": ("bbb", 12, 12),
+        "db3": ("ccc", 11, 11),
+        "db4": ("ddd", 0, None),
+    }
+
+    # Brak większości - wybierana jest baza z najświeższym kluczem
+    assert load_balancer._elect_reference_database(digests) == "db2"
+
+
+def test_elect_reference_database_tie_is_deterministic():
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+    digests = {
+        "db4": ("bbb", 5, 5),
+        "db3": ("bbb", 5, 5),
+        "db2": ("aaa", 5, 5),
+        "db1": ("aaa", 5, 5),
+    }
+
+    # Remis na wszystkich kryteriach rozstrzyga nazwa bazy
+    assert load_balancer._elect_reference_database(digests) == "db1"
+
+
+@patch("loadbalancer.execute_batch")
+@patch("psycopg2.connect")
+def test_copy_commits_every_batch_and_deletes_missing_keys(mock_connect, mock_execute_batch):
+    target, source = MagicMock(), MagicMock()
+    mock_connect.side_effect = [target, source]
+    source_cursor = source.cursor.return_value.__enter__.return_value
+    source_cursor.fetchall.side_effect = [[(1, "a"), (3, "c")], [(4, "d")], []]
+    target_cursor = target.cursor.return_value.__enter__.return_value
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    report = load_balancer._copy_table(load_balancer.databases[0], [load_balancer.databases[1]], "users",
+                                       ["id", "name"], ["id"], None, batch_size=2)
+
+    assert report == {"source": "db1", "synchronized": ["db2"], "failed": [], "rows": 3}
+    # Każda paczka jest osobną, krótką transakcją - bez usuwania całej tabeli
+    assert target.commit.call_count >= 3
+    deletes = [call.args[1] for call in target_cursor.execute.call_args_list if isinstance(call.args[1], list)]
+    assert deletes == [
+        [(3,), ((1,), (3,))],
+        [(3,), (4,), ((4,),)],
+        [(4,)],
+    ]
+    # Źródło jest czytane krótkimi zapytaniami od ostatniego klucza, bez otwartej transakcji między paczkami
+    assert source.autocommit is True
+    assert all(call.args == () and call.kwargs == {} for call in source.cursor.call_args_list)
+    assert [call.args[1] for call in source_cursor.execute.call_args_list] == [[2], [(3,), 2], [(4,), 2]]
+
+
+@patch("loadbalancer.execute_batch")
+@patch("psycopg2.connect")
+def test_copy_moves_serial_sequences_past_copied_keys(mock_connect, mock_execute_batch):
+    target, source = MagicMock(), MagicMock()
+    mock_connect.side_effect = [target, source]
+    source.cursor.return_value.__enter__.return_value.fetchall.side_effect = [[(7, "a")], []]
+    target_cursor = target.cursor.return_value.__enter__.return_value
+    target_cursor.fetchall.return_value = [("id", 'public."Order_id_seq"'), ("name", None)]
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    load_balancer._copy_table(load_balancer.databases[0], [load_balancer.databases[1]], "Order",
+                              ["id", "name"], ["id"], None, batch_size=2)
+
+    # Sekwencja kolumny serial jest ustawiana na największy skopiowany klucz
+    setval_calls = [call.args for call in target_cursor.execute.call_args_list
+                    if call.args[1:] == (('public."Order_id_seq"',),)]
+    assert len(setval_calls) == 1
+
+
+@patch("loadbalancer.execute_batch")
+@patch("psycopg2.connect")
+def test_copy_without_key_streams_one_transaction(mock_connect, mock_execute_batch):
+    target, source = MagicMock(), MagicMock()
+    mock_connect.side_effect = [target, source]
+    source.cursor.return_value.__enter__.return_value.fetchmany.side_effect = [[(1, "a")], []]
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    report = load_balancer._copy_table(load_balancer.databases[0], [load_balancer.databases[1]], "users",
+                                       ["id", "name"], [], None, batch_size=2)
+
+    # Tabela bez klucza jest kopiowana kursorem serwerowym w jednej transakcji
+    assert report["rows"] == 1 and report["synchronized"] == ["db2"]
+    source.cursor.assert_called_once_with(name="lb_synchronize")
+    assert target.commit.call_count == 2
+
+
+@patch("psycopg2.connect")
+def test_table_digest_is_a_bounded_aggregate(mock_connect):
+    cursor = mock_connect.return_value.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = ("2:123", 2, 7)
+    load_balancer = LoadBalancer(CONFIG_FILE, "users")
+
+    assert load_balancer._fetch_table_digest(load_balancer.databases[0], "users", ["id"]) == ("2:123", 2, 7)
+
+    # Skrót to suma skrótów wierszy, a nie sklejony tekst całej tabeli sortowany przy każdym głosowaniu
+    query = render(cursor.execute.call_args.args[0])
+    assert "sum(" in query and 'max(t."id")' in query
+    assert "string_agg" not in query and "array_agg" not in query and "ORDER BY" not in query
@@ -0,0 +1,92 @@
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+import psycopg2
+from loadbalancer import LoadBalancer
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+def make_connection(fail_execute=False):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.rowcount = 1
+    if fail_execute:
+        cursor.execute.side_effect = psycopg2.Error("boom")
+    return connection
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_atomic_write_commits_on_all_databases(mock_connect, mock_reset, tmp_path):
+    mock_connect.return_value = MagicMock()
+    log_file = str(tmp_path / "tpc.log")
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", atomic_writes=True, tpc_log_file=log_file)
+
+    connections = [make_connection() for _ in range(4)]
+    mock_connect.side_effect = connections
+    result = load_balancer.execute_non_select_query("DELETE FROM users WHERE id = %s;", (1,))
+
+    # Wszystkie bazy przygotowały transakcję, więc wszystkie ją zatwierdzają
+    assert result == 1
+    for connection in connections:
+        connection.tpc_prepare.assert_called_once()
+        connection.tpc_commit.assert_called_once()
+    assert len(load_balancer._load_commit_decisions()) == 1
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_atomic_write_rolls_back_when_one_database_fails(mock_connect, mock_reset, tmp_path):
+    mock_connect.return_value = MagicMock()
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", atomic_writes=True, tpc_log_file=str(tmp_path / "tpc.log"))
+
+    connections = [make_connection(), make_connection(fail_execute=True), make_connection(), make_connection()]
+    mock_connect.side_effect = connections
+    result = load_balancer.execute_non_select_query("DELETE FROM users WHERE id = %s;", (1,))
+
+    # Błąd na jednej bazie wycofuje transakcję na wszystkich pozostałych
+    assert result is None
+    for connection in connections:
+        connection.tpc_commit.assert_not_called()
+        connection.tpc_rollback.assert_called_once()
+    mock_reset.assert_not_called()
+
+
+def make_xid(gtrid, age):
+    xid = MagicMock(gtrid=gtrid, database="database1")
+    xid.prepared = datetime.now(timezone.utc) - timedelta(seconds=age)
+    return xid
+
+
+@patch("psycopg2.connect")
+def test_recovery_leaves_recent_transactions_of_other_instances(mock_connect, tmp_path):
+    connection = MagicMock()
+    connection.info.dbname = "database1"
+    old, recent = make_xid("lb-old", age=600), make_xid("lb-recent", age=1)
+    connection.tpc_recover.return_value = [old, recent]
+    mock_connect.return_value = connection
+
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", tpc_log_file=str(tmp_path / "tpc.log"), tpc_grace_period=30)
+    load_balancer.recover_prepared_transactions()
+
+    # Tylko stara transakcja bez decyzji jest wycofywana
+    rolled_back = [call.args[0] for call in connection.tpc_rollback.call_args_list]
+    assert old in rolled_back and recent not in rolled_back
+
+
+@patch("psycopg2.connect")
+def test_failed_commit_is_retried_in_background(mock_connect, tmp_path):
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", tpc_log_file=str(tmp_path / "tpc.log"), tpc_retry_delay=0)
+    failing = MagicMock()
+    failing.tpc_commit.side_effect = psycopg2.OperationalError("connection lost")
+    retry_connection = MagicMock()
+    mock_connect.return_value = retry_connection
+
+    with patch("loadbalancer.Thread") as mock_thread:
+        load_balancer._finish_transaction(load_balancer.databases[0], failing, "lb-1", commit=True)
+        target, args = mock_thread.call_args.kwargs["target"], mock_thread.call_args.kwargs["args"]
+    target(*args)
+
+    retry_connection.xid.assert_called_once_with(0, "lb-1", "db1")
+    retry_connection.tpc_commit.assert_called_once_with(retry_connection.xid.return_value)
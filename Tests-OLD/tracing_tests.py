@@ -0,0 +1,114 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+from loadbalancer import LoadBalancer
+from tracing.tracer import Tracer, RingBufferSink, JsonLinesSink, NOOP_TRACER
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "..", "Connection", "db.json")
+
+
+@patch("psycopg2.connect")
+def test_select_records_every_phase_in_one_trace(mock_connect):
+    mock_connect.return_value.cursor.return_value.__enter__.return_value.fetchall.return_value = [(1,)]
+    sink = RingBufferSink()
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", tracer=Tracer(sink))
+
+    assert load_balancer.execute_select("SELECT 1;") == [(1,)]
+
+    spans = sink.spans()
+    root = spans[-1]
+    assert root.name == "select" and root.parent_id is None
+    assert {span.name for span in spans} == {"select", "select_database", "connect", "execute", "fetch"}
+    # Wszystkie fazy należą do jednego śladu i są dziećmi zapytania
+    assert all(span.trace_id == root.trace_id for span in spans)
+    assert all(span.parent_id == root.span_id for span in spans[:-1])
+    assert set(sink.breakdown(root.trace_id)) == {span.name for span in spans}
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_span_context_follows_fan_out_writes(mock_connect, mock_reset, tmp_path):
+    mock_connect.return_value.cursor.return_value.__enter__.return_value.rowcount = 1
+    sink = RingBufferSink()
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", atomic_writes=True, tpc_log_file=str(tmp_path / "tpc.log"))
+    load_balancer.tracer = Tracer(sink)
+
+    load_balancer.execute_non_select_query("DELETE FROM users WHERE id = %s;", (1,))
+
+    spans = sink.spans()
+    root = spans[-1]
+    assert root.name == "write"
+    # Spany z wątków puli należą do śladu zapisu
+    prepared = [span for span in spans if span.name == "prepare"]
+    assert sorted(span.attributes["database"] for span in prepared) == ["db1", "db2", "db3", "db4"]
+    assert all(span.trace_id == root.trace_id and span.parent_id == root.span_id for span in prepared)
+
+
+@patch("loadbalancer.LoadBalancer.reset_sequences")
+@patch("psycopg2.connect")
+def test_coalesced_writes_join_their_callers_traces(mock_connect, mock_reset):
+    mock_connect.return_value.cursor.return_value.__enter__.return_value.rowcount = 1
+    sink = RingBufferSink()
+    load_balancer = LoadBalancer(CONFIG_FILE, "users", tracer=Tracer(sink))
+    load_balancer.enable_write_coalescing(window=0.5, max_batch_size=4)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(
+                lambda i: load_balancer.execute_non_select_query("DELETE FROM users WHERE id = %s;", (i,)),
+                range(4)))
+    finally:
+        load_balancer.disable_write_coalescing()
+
+    spans = sink.spans()
+    writes = {span.span_id: span for span in spans if span.name == "write"}
+    # Każdy zapis ma własne wykonania na czterech bazach, bez osieroconych śladów z wątku wsadu
+    assert len(writes) == 4
+    assert all(span.parent_id in writes for span in spans if span.name != "write")
+    for write in writes.values():
+        executed = [span for span in spans if span.name == "execute" and span.parent_id == write.span_id]
+        assert len(executed) == 4 and all(span.trace_id == write.trace_id for span in executed)
+    assert len([span for span in spans if span.name == "commit"]) == 4
+
+
+def test_child_span_outside_request_records_nothing():
+    sink = RingBufferSink()
+    tracer = Tracer(sink)
+
+    with tracer.child_span("reset_sequences"):
+        pass
+    with tracer.span("write"):
+        with tracer.child_span("reset_sequences"):
+            pass
+
+    # Pomocnik wywołany z wątku w tle nie zaczyna własnego śladu
+    assert [span.name for span in sink.spans()] == ["reset_sequences", "write"]
+    assert sink.spans()[0].parent_id == sink.spans()[1].span_id
+
+
+def test_failed_span_records_error_and_json_export(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    sink = JsonLinesSink(str(path))
+    tracer = Tracer(sink)
+
+    try:
+        with tracer.span("execute", database="db1"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    sink.close()
+
+    record = json.loads(path.read_text().splitlines()[0])
+    assert record["name"] == "execute"
+    assert record["attributes"] == {"database": "db1"}
+    assert record["error"] == "ValueError: boom"
+
+
+def test_noop_tracer_records_nothing():
+    function = MagicMock()
+
+    with NOOP_TRACER.span("select") as span:
+        span.set_attribute("database", "db1")
+
+    assert NOOP_TRACER.wrap(function) is function
+    assert NOOP_TRACER.span("a") is NOOP_TRACER.span("b")
@@ -0,0 +1,95 @@
+import random
+import time
+from collections import Counter
+from unittest.mock import MagicMock
+import pytest
+from strategies.round_robin import RoundRobinStrategy
+from workload.driver import KeyChooser, WorkloadDriver
+from workload.statistics import percentile
+
+
+def test_zipfian_keys_favour_low_ids():
+    chooser = KeyChooser(100, "zipfian", zipf_s=1.2, rng=random.Random(0))
+    keys = [chooser.next_key() for _ in range(10000)]
+
+    # Wszystkie klucze mieszczą się w przestrzeni, a klucz 1 jest najczęstszy
+    assert min(keys) >= 1 and max(keys) <= 100
+    assert keys.count(1) > keys.count(2) > keys.count(50)
+
+
+def test_uniform_keys_cover_key_space():
+    chooser = KeyChooser(10, "uniform", rng=random.Random(0))
+    keys = {chooser.next_key() for _ in range(1000)}
+
+    assert keys == set(range(1, 11))
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 99) == 0.0
+
+
+DATABASES = [{"Name": "db1"}, {"Name": "db2"}, {"Name": "db3"}]
+
+
+def make_driver(ratios, rate=100, duration=0.1, concurrency=4, operation_time=0.0, mode="threads"):
+    load_balancer = MagicMock()
+    load_balancer.strategy = RoundRobinStrategy()
+    picked = []
+
+    def select(query, params):
+        # Odczyt przechodzi przez strategię podmienioną przez sterownik, jak w LoadBalancer.execute_select
+        picked.append(load_balancer.strategy.select_database(DATABASES)["Name"])
+        time.sleep(operation_time)
+        return [(params[0],)]
+
+    def write(query, params):
+        time.sleep(operation_time)
+        return 1
+
+    load_balancer.execute_select.side_effect = select
+    load_balancer.execute_non_select_query.side_effect = write
+    driver = WorkloadDriver(load_balancer, "users", ratios, KeyChooser(100, rng=random.Random(0)), rate, duration,
+                            concurrency=concurrency, mode=mode, report_interval=60, rng=random.Random(0))
+    return driver, load_balancer, picked
+
+
+def test_operation_mix_follows_ratios():
+    driver, _, _ = make_driver({"read": 70, "insert": 15, "update": 10, "delete": 5})
+
+    counts = Counter(driver.next_operation()[0] for _ in range(20000))
+
+    assert abs(counts["read"] / 20000 - 0.70) < 0.02
+    assert abs(counts["insert"] / 20000 - 0.15) < 0.02
+    assert abs(counts["update"] / 20000 - 0.10) < 0.02
+    assert abs(counts["delete"] / 20000 - 0.05) < 0.02
+
+
+@pytest.mark.parametrize("mode", ["threads", "asyncio"])
+def test_short_run_attributes_reads_to_the_picked_backend(capsys, mode):
+    driver, load_balancer, picked = make_driver({"read": 3, "delete": 1}, rate=400, duration=0.099, mode=mode)
+
+    driver.run()
+
+    # Wszystkie zaplanowane operacje zostały wykonane, a odczyty policzone per baza wybraną przez strategię
+    latencies = driver.stats.latencies
+    assert len(latencies["read"]) + len(latencies["delete"]) == 40
+    assert len(latencies["read"]) == load_balancer.execute_select.call_count
+    assert driver.strategy.counts == dict(Counter(picked))
+    assert set(driver.strategy.counts) == {"db1", "db2", "db3"}
+    assert "Read distribution per database" in capsys.readouterr().out
+
+
+def test_latency_includes_time_queued_for_a_worker(capsys):
+    driver, _, _ = make_driver({"read": 1}, rate=100, duration=0.095, concurrency=1, operation_time=0.03)
+
+    driver.run()
+
+    # Otwarta pętla: przy jednym wątku późniejsze operacje czekają w kolejce i ten czas liczy się do opóźnienia
+    latencies = driver.stats.latencies["read"]
+    assert len(latencies) == 10
+    assert min(latencies) >= 0.03
+    assert max(latencies) >= 0.15
@@ -0,0 +1,107 @@
+import time
+from threading import Condition
+from admission.concurrency_limits import AIMDLimit, GradientLimit
+from logger.singleton_logger import SingletonLogger
+
+
+class LoadSheddingError(RuntimeError):
+    """Raised when a query is rejected because no backend has spare capacity."""
+
+
+class AdmissionController:
+    LIMITS = {
+        "aimd": AIMDLimit,
+        "gradient": GradientLimit,
+    }
+
+    def __init__(self, algorithm="aimd", max_queue_size=100, queue_timeout=1.0, **limit_options):
+        """
+        Initialize the AdmissionController.
+        :param algorithm: Limit algorithm used for every backend ('aimd' or 'gradient').
+        :param max_queue_size: Maximum number of queries waiting for a permit.
+        :param queue_timeout: Default time (in seconds) a query may wait for a permit.
+        :param limit_options: Keyword arguments passed to the limit algorithm.
+        """
+        if algorithm not in self.LIMITS:
+            raise ValueError(f"Unknown limit algorithm: {algorithm}")
+        self.limit_class = self.LIMITS[algorithm]
+        self.limit_options = limit_options
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.logger = SingletonLogger().get_logger()
+        self.condition = Condition()
+        self.limits = {}
+        self.inflight = {}
+        self.waiting = 0
+
+    def _has_capacity(self, db_name):
+        if db_name not in self.limits:
+            self.limits[db_name] = self.limit_class(**self.limit_options)
+            self.inflight[db_name] = 0
+        return self.inflight[db_name] < int(self.limits[db_name].limit)
+
+    def has_capacity(self, db_name):
+        with self.condition:
+            return self._has_capacity(db_name)
+
+    def acquire(self, databases, select, timeout=None):
+        """
+        Select a backend with a spare permit and take the permit.
+        Waits in a bounded queue while every backend is at its limit.
+        :param databases: List of candidate database configurations.
+        :param select: Function choosing a database from the ones with spare permits.
+        :param timeout: Maximum time (in seconds) to wait; defaults to queue_timeout.
+        :return: Selected database configuration.
+        :raises LoadSheddingError: If the queue is full or the deadline passes.
+        """
+        deadline = time.monotonic() + (self.queue_timeout if timeout is None else timeout)
+        queued = False
+        with self.condition:
+            try:
+                while True:
+                    available = [db for db in databases if self._has_capacity(db["Name"])]
+                    if available:
+                        db_info = select(available)
+                        self.inflight[db_info["Name"]] += 1
+                        return db_info
+
+                    if not queued:
+                        if self.waiting >= self.max_queue_size:
+                            self.logger.warning("Admission queue is full. Shedding query.")
+                            raise LoadSheddingError("All backends are at capacity and the admission queue is full.")
+                        self.waiting += 1
+                        queued = True
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.logger.warning("Timed out waiting for a backend permit. Shedding query.")
+                        raise LoadSheddingError("Timed out waiting for a backend with spare capacity.")
+                    self.condition.wait(remaining)
+            finally:
+                if queued:
+                    self.waiting -= 1
+
+    def release(self, db_name, latency, dropped=False):
+        """
+        Return a permit and adapt the backend's limit to the observed latency.
+        :param db_name: Name of the database the permit was taken for.
+        :param latency: Duration of the query in seconds.
+        :param dropped: Whether the query failed.
+        """
+        with self.condition:
+            if db_name not in self.inflight:
+                return
+            inflight = self.inflight[db_name]
+            self.inflight[db_name] = max(0, inflight - 1)
+            self.limits[db_name].update(latency, inflight, dropped)
+            self.condition.notify_all()
+
+    def snapshot(self):
+        """
+        :return: Dictionary mapping database name to its current limit and queries in flight.
+        """
+        with self.condition:
+            return {
+                db_name: {"limit": int(limit.limit), "inflight": self.inflight[db_name]}
+                for db_name, limit in self.limits.items()
+            }
@@ -0,0 +1,82 @@
+import math
+
+
+class AIMDLimit:
+    def __init__(self, initial_limit=10, min_limit=1, max_limit=200, backoff_ratio=0.9, latency_threshold=0.5):
+        """
+        Additive-increase/multiplicative-decrease concurrency limit.
+        :param initial_limit: Starting number of concurrent queries.
+        :param min_limit: Lower bound of the limit.
+        :param max_limit: Upper bound of the limit.
+        :param backoff_ratio: Factor applied to the limit when a query is slow or dropped.
+        :param latency_threshold: Latency (in seconds) above which a query counts as slow.
+        """
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+
+    def update(self, latency, inflight, dropped=False):
+        """
+        Adjust the limit after a query completed.
+        :param latency: Duration of the query in seconds.
+        :param inflight: Number of queries in flight when the query completed.
+        :param dropped: Whether the query failed.
+        :return: The new limit.
+        """
+        if dropped or latency > self.latency_threshold:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff_ratio))
+        elif inflight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+        return self.limit
+
+
+class GradientLimit:
+    def __init__(self, initial_limit=10, min_limit=1, max_limit=200, smoothing=0.2, tolerance=1.5,
+                 reset_interval=1000):
+        """
+        Vegas-style limit driven by the gradient between the minimum and the current latency.
+        :param initial_limit: Starting number of concurrent queries.
+        :param min_limit: Lower bound of the limit.
+        :param max_limit: Upper bound of the limit.
+        :param smoothing: Weight of a new estimate in the exponential moving average of the limit.
+        :param tolerance: How much the latency may exceed the minimum before the limit shrinks.
+        :param reset_interval: Number of samples after which the minimum latency is measured again.
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        self.tolerance = tolerance
+        self.reset_interval = reset_interval
+        self.min_latency = None
+        self.samples = 0
+
+    def update(self, latency, inflight, dropped=False):
+        """
+        Adjust the limit after a query completed.
+        :param latency: Duration of the query in seconds.
+        :param inflight: Number of queries in flight when the query completed.
+        :param dropped: Whether the query failed.
+        :return: The new limit.
+        """
+        self.samples += 1
+        if self.samples % self.reset_interval == 0:
+            self.min_latency = None
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+
+        if dropped:
+            gradient = 0.5
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * self.min_latency / max(latency, 1e-9)))
+
+        # Do not grow the limit when the backend is not using it
+        if not dropped and inflight * 2 < self.limit:
+            return int(self.limit)
+
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = (1 - self.smoothing) * self.limit + self.smoothing * new_limit
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+        return int(self.limit)
@@ -0,0 +1,173 @@
+import time
+import psycopg2
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Queue, Empty
+from threading import Lock, Thread
+from logger.singleton_logger import SingletonLogger
+
+
+def _call(function, *args):
+    return function(*args)
+
+
+class WriteCoalescer:
+    def __init__(self, load_balancer, window=0.005, max_batch_size=64):
+        """
+        Initialize the WriteCoalescer.
+        :param load_balancer: LoadBalancer whose active databases receive the writes.
+        :param window: Time (in seconds) to wait for more statements after the first one arrives.
+        :param max_batch_size: Maximum number of statements committed in one transaction.
+        """
+        self.load_balancer = load_balancer
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.logger = SingletonLogger().get_logger()
+        self.queue = Queue()
+        self.running = True
+        # Orders submits against stop, so no statement is queued behind the stop sentinel
+        self.lock = Lock()
+        self.thread = Thread(target=self._run, name="WriteCoalescer", daemon=True)
+        self.thread.start()
+
+    def submit(self, query, params=None):
+        """
+        Queue a statement and wait until the batch containing it is committed.
+        :param query: SQL statement to execute on all active databases.
+        :param params: Query parameters.
+        :return: Number of rows affected by the statement.
+        :raises Exception: The error of the statement if it failed on every database.
+        """
+        future = Future()
+        # Bound to the caller's span, so the batch work traced on its behalf joins the caller's trace
+        run = self.load_balancer.tracer.wrap(_call)
+        with self.lock:
+            if not self.running:
+                raise RuntimeError("WriteCoalescer is stopped.")
+            self.queue.put((query, params, future, run))
+        return future.result()
+
+    def stop(self):
+        """
+        Flush the pending statements and stop the background thread.
+        """
+        with self.lock:
+            self.running = False
+            self.queue.put(None)
+        self.thread.join()
+        self.logger.info("WriteCoalescer stopped.")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            self._flush(batch)
+
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except Empty:
+                break
+            if item is not None:
+                item[2].set_exception(RuntimeError("WriteCoalescer is stopped."))
+
+    def _flush(self, batch):
+        """
+        Execute a batch and resolve every caller's future, even if the flush itself fails.
+        """
+        try:
+            self._flush_batch(batch)
+        except Exception as e:
+            self.logger.error(f"Error flushing batch of {len(batch)} statements: {e}")
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _flush_batch(self, batch):
+        """
+        Execute a batch in one transaction per database.
+        A statement succeeds if it succeeded on at least one database.
+        """
+        databases = self.load_balancer.write_databases()
+        if not databases:
+            for _, _, future, _ in batch:
+                future.set_exception(RuntimeError("No active databases available."))
+            return
+
+        with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+            outcomes = list(executor.map(lambda db: self._execute_batch(db, batch), databases))
+
+        any_success = False
+        for index, (_, _, future, _) in enumerate(batch):
+            results = [outcome[index] for outcome in outcomes]
+            rowcounts = [result for result in results if not isinstance(result, Exception)]
+            if rowcounts:
+                any_success = True
+                future.set_result(rowcounts[0])
+            else:
+                future.set_exception(results[0])
+
+        self.logger.info(f"Committed batch of {len(batch)} statements on {len(databases)} databases.")
+        if any_success:
+            batch[0][3](self.load_balancer.reset_sequences)
+
+    def _execute_batch(self, db, batch):
+        """
+        Execute all statements of a batch on a single database in one transaction.
+        Each statement runs inside a savepoint, so a failing statement does not abort the others.
+        Every statement is traced in its caller's trace; the shared connect and commit are traced
+        in the trace of the first statement of the batch.
+        :return: List with a rowcount or an exception for every statement.
+        """
+        conn_str = self.load_balancer._parse_connection_string(db["ConnectionString"])
+        first_run = batch[0][3]
+        conn = None
+        try:
+            conn = first_run(self._connect, db, conn_str, len(batch))
+            results = []
+            with conn.cursor() as cursor:
+                for query, params, _, run in batch:
+                    cursor.execute("SAVEPOINT coalesced_write;")
+                    try:
+                        results.append(run(self._execute_statement, db, cursor, query, params))
+                        cursor.execute("RELEASE SAVEPOINT coalesced_write;")
+                    except Exception as e:
+                        # Includes argument formatting errors (IndexError, TypeError) raised by psycopg2
+                        self.logger.error(f"Error executing query on database {db['Name']}: {e}")
+                        cursor.execute("ROLLBACK TO SAVEPOINT coalesced_write;")
+                        results.append(e)
+            first_run(self._commit, db, conn, len(batch))
+            return results
+        except Exception as e:
+            self.logger.error(f"Error committing batch on database {db['Name']}: {e}")
+            return [e] * len(batch)
+        finally:
+            if conn:
+                conn.close()
+
+    def _connect(self, db, conn_str, statements):
+        with self.load_balancer.tracer.span("connect", database=db["Name"], statements=statements):
+            return psycopg2.connect(**conn_str)
+
+    def _execute_statement(self, db, cursor, query, params):
+        with self.load_balancer.tracer.span("execute", database=db["Name"]):
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+    def _commit(self, db, conn, statements):
+        with self.load_balancer.tracer.span("commit", database=db["Name"], statements=statements):
+            conn.commit()
@@ -1,6 +1,8 @@
 from strategies.least_connections import LeastConnectionsStrategy
+from strategies.least_loaded import LeastLoadedStrategy
 from strategies.random_strategy import  RandomStrategy
 from strategies.round_robin import RoundRobinStrategy
+from strategies.weighted import WeightedStrategy
 
 
 class LoadBalancingStrategyFactory:
@@ -10,6 +12,8 @@ class LoadBalancingStrategyFactory:
             "round_robin": RoundRobinStrategy,
             "random": RandomStrategy,
             "least_connections": LeastConnectionsStrategy,
+            "least_loaded": LeastLoadedStrategy,
+            "weighted": WeightedStrategy,
         }
         try:
             return strategies[strategy_type]()
@@ -1,19 +1,70 @@
 import psycopg2
 import json
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Thread, Timer
+from admission.admission_controller import AdmissionController
+from coalescer.write_coalescer import WriteCoalescer
 from factory.strategy_factory import LoadBalancingStrategyFactory
 from logger.singleton_logger import SingletonLogger
 from observer.base_observer import Observer
+from psycopg2 import sql
+from psycopg2.extras import execute_batch
+from recovery.recovery_worker import RecoveryWorker
+from routing.sql_classifier import SQLClassifier, READ, WRITE, DDL
+from synchronization.sync_engine import SyncEngine
+from tracing.tracer import NOOP_TRACER
 
 
 class LoadBalancer(Observer):
-    def __init__(self, config_file, table_name, strategy_type="round_robin"):
+    TPC_PREFIX = "lb-"
+    TPC_LOG_NAME = "tpc_decisions.log"
+
+    def __init__(self, config_file, table_name, strategy_type="round_robin", atomic_writes=False,
+                 tpc_log_file=None, sync_rows_per_second=None, tracer=None, tpc_grace_period=60.0,
+                 tpc_retry_delay=5.0):
+        """
+        :param config_file: Path to the JSON file with database configurations.
+        :param table_name: Name of the table kept in sync across databases.
+        :param strategy_type: Load balancing strategy used for SELECT queries.
+        :param atomic_writes: Commit writes on all active databases with two-phase commit.
+        :param tpc_log_file: File recording commit decisions of two-phase transactions. Defaults to
+                             tpc_decisions.log next to the configuration file.
+        :param tpc_grace_period: Age (in seconds) below which in-doubt transactions without a commit decision
+                                 are left alone by recovery, as another running instance may still finish them.
+        :param tpc_retry_delay: Time (in seconds) between background retries of failed COMMIT/ROLLBACK PREPARED.
+        :param sync_rows_per_second: Limit of rows copied per second when a rejoining database catches up.
+        :param tracer: Tracer recording the phases of every query; tracing is disabled by default.
+        """
         self.table_name = table_name
         self.logger = SingletonLogger().get_logger()
         self.logger.info(f"Initializing LoadBalancer with strategy: {strategy_type}")
         self.config_file = config_file
+        self.tracer = tracer or NOOP_TRACER
         self.databases = self.load_config()
         self.active_databases = self.databases.copy()
+        self.catching_up_databases = []
+        self.membership_lock = Lock()
         self.strategy = LoadBalancingStrategyFactory.create_strategy(strategy_type)
+        self.atomic_writes = atomic_writes
+        self.tpc_log_file = tpc_log_file or os.path.join(
+            os.path.dirname(os.path.abspath(config_file)), self.TPC_LOG_NAME)
+        self.tpc_grace_period = tpc_grace_period
+        self.tpc_retry_delay = tpc_retry_delay
+        self.tpc_log_lock = Lock()
+        self.write_coalescer = None
+        self.admission_controller = None
+        self.classifier = SQLClassifier()
+        self.table_access = Counter()
+        self.load_signals = {}
+        self.sync_engine = SyncEngine(self)
+        self.recovery_worker = RecoveryWorker(self, max_rows_per_second=sync_rows_per_second)
+        if self.atomic_writes:
+            self.recover_prepared_transactions()
 
     def load_config(self):
         """
@@ -34,34 +85,92 @@ class LoadBalancer(Observer):
     def set_strategy(self, strategy_type):
         try:
             self.strategy = LoadBalancingStrategyFactory.create_strategy(strategy_type)
+            if hasattr(self.strategy, "update_load"):
+                for db_name, load in self.load_signals.items():
+                    self.strategy.update_load(db_name, load)
             self.logger.info(f"Strategy changed to: {strategy_type}")
         except ValueError as e:
             self.logger.error(f"Failed to change strategy: {e}")
             raise
 
+    def enable_write_coalescing(self, window=0.005, max_batch_size=64):
+        """
+        Group concurrent writes into one transaction per database.
+        Statements arriving within the window (or up to max_batch_size of them) share a commit.
+        Has no effect while atomic writes are enabled.
+        :param window: Time (in seconds) to wait for more statements after the first one arrives.
+        :param max_batch_size: Maximum number of statements committed in one transaction.
+        """
+        self.disable_write_coalescing()
+        self.write_coalescer = WriteCoalescer(self, window=window, max_batch_size=max_batch_size)
+        self.logger.info(f"Write coalescing enabled (window: {window}s, max batch size: {max_batch_size}).")
+
+    def disable_write_coalescing(self):
+        if self.write_coalescer:
+            self.write_coalescer.stop()
+            self.write_coalescer = None
+
+    def enable_admission_control(self, algorithm="aimd", max_queue_size=100, queue_timeout=1.0, **limit_options):
+        """
+        Limit concurrent SELECT queries per database with limits adapted from observed latency.
+        Only databases with spare permits are offered to the strategy; when none has one, queries
+        wait in a bounded queue and are shed with LoadSheddingError once it is full or they time out.
+        :param algorithm: Limit algorithm ('aimd' or 'gradient').
+        :param max_queue_size: Maximum number of queries waiting for a permit.
+        :param queue_timeout: Time (in seconds) a query may wait for a permit.
+        :param limit_options: Keyword arguments passed to the limit algorithm.
+        """
+        self.admission_controller = AdmissionController(
+            algorithm=algorithm, max_queue_size=max_queue_size, queue_timeout=queue_timeout, **limit_options)
+        self.logger.info(f"Admission control enabled with {algorithm} limits.")
+
     def get_connection(self):
+        """
+        Select a database with the current strategy and connect to it.
+        Every successful call must be followed by release_connection.
+        :return: Tuple (connection, database name), or (None, None) if the connection failed.
+        """
         if not self.active_databases:
             self.logger.error("No active databases available.")
             raise RuntimeError("No active databases available.")
 
-        db_info = self.strategy.select_database(self.active_databases)
+        with self.tracer.span("select_database") as span:
+            if self.admission_controller:
+                db_info = self.admission_controller.acquire(self.active_databases, self.strategy.select_database)
+            else:
+                db_info = self.strategy.select_database(self.active_databases)
+            span.set_attribute("database", db_info["Name"])
         self.logger.debug(f"Selected database: {db_info['Name']}")
 
         conn_str = self._parse_connection_string(db_info["ConnectionString"])
         try:
             self.logger.info(f"Connected to database: {db_info['Name']}")
-            connection = psycopg2.connect(**conn_str)
+            with self.tracer.span("connect", database=db_info["Name"]):
+                connection = psycopg2.connect(**conn_str)
             return connection, db_info['Name']
         except psycopg2.OperationalError as e:
             self.logger.error(f"Failed to connect to {db_info['Name']}: {e}")
+            self.release_connection(db_info['Name'], 0.0, dropped=True)
             self.update(db_info['Name'], status="unhealthy")
             return None, None
 
+    def release_connection(self, db_name, latency, dropped=False):
+        """
+        Report that a query selected by get_connection has finished.
+        :param db_name: Name of the database the query ran on.
+        :param latency: Duration of the query in seconds.
+        :param dropped: Whether the query failed.
+        """
+        if self.admission_controller:
+            self.admission_controller.release(db_name, latency, dropped)
+        if hasattr(self.strategy, "release_connection"):
+            self.strategy.release_connection(db_name)
+
     def create_table(self, schema):
         """
-        Create a table in all active databases.
+        Create a table in all active databases and the ones catching up.
         """
-        for db in self.active_databases:
+        for db in self.write_databases():
             conn_str = self._parse_connection_string(db["ConnectionString"])
             conn = None
             try:
@@ -80,144 +189,709 @@ class LoadBalancer(Observer):
 
     def reset_sequences(self):
         query = "SELECT setval(pg_get_serial_sequence('users', 'id'), COALESCE(MAX(id), 0), true) FROM users;"
-        for db in self.active_databases:
+        with self.tracer.child_span("reset_sequences"):
+            for db in self.write_databases():
+                conn_str = self._parse_connection_string(db["ConnectionString"])
+                conn = None
+                try:
+                    conn = psycopg2.connect(**conn_str)
+                    with conn.cursor() as cursor:
+                        cursor.execute(query)
+                        conn.commit()
+                except Exception as e:
+                    # self.logger.error(f"Error resetting sequence in database {db['Name']}: {e}")
+                    pass
+                finally:
+                    if conn:
+                        conn.close()
+
+    def write_databases(self):
+        """
+        :return: Databases receiving writes: the active ones and the ones catching up.
+        """
+        with self.membership_lock:
+            return self.active_databases + self.catching_up_databases
+
+    def execute(self, query, params=None):
+        """
+        Execute a statement, routing reads to one database and writes and DDL to all active databases.
+        :param query: SQL statement.
+        :param params: Query parameters.
+        :return: Rows for reads, number of affected rows for writes and DDL.
+        """
+        classification = self.classifier.classify(query)
+        for table in classification.tables:
+            self.table_access[(table, classification.kind)] += 1
+
+        if classification.kind == READ:
+            return self.execute_select(query, params)
+        if classification.kind in (WRITE, DDL):
+            return self.execute_non_select_query(query, params)
+
+        self.logger.error(f"Unsupported {classification.kind} statement: {classification.keyword}")
+        raise ValueError(
+            f"{classification.keyword} cannot be executed through the load balancer: "
+            f"every statement runs on its own connection.")
+
+    def execute_select(self, query, params=None):
+        with self.tracer.span("select", query=query):
+            conn, db_name = self.get_connection()
+            if conn:
+                started = time.monotonic()
+                dropped = False
+                try:
+                    with conn.cursor() as cursor:
+                        with self.tracer.span("execute", database=db_name):
+                            cursor.execute(query, params)
+                        with self.tracer.span("fetch", database=db_name):
+                            result = cursor.fetchall()
+                        return result
+                except Exception as e:
+                    dropped = True
+                    self.logger.error(f"Error executing SELECT on {db_name}: {e}")
+                finally:
+                    conn.close()
+                    self.release_connection(db_name, time.monotonic() - started, dropped)
+
+    def execute_select_many(self, queries):
+        """
+        Execute a batch of read queries. The strategy assigns the whole batch at once, queries assigned
+        to the same database run one after another over a single connection, and databases run in parallel.
+        :param queries: List of queries, each a SQL string or a (query, params) tuple.
+        :return: List of results in the order of the queries; None for queries that failed.
+        """
+        if not self.active_databases:
+            self.logger.error("No active databases available.")
+            raise RuntimeError("No active databases available.")
+        queries = [query if isinstance(query, tuple) else (query, None) for query in queries]
+        if self.admission_controller:
+            # Permits are acquired per query, so the batch cannot share connections
+            return [self.execute_select(query, params) for query, params in queries]
+
+        with self.tracer.span("select_many", queries=len(queries)):
+            with self.tracer.span("select_database"):
+                selected = self.strategy.select_many(self.active_databases, len(queries))
+            groups = {}
+            for position, db in enumerate(selected):
+                groups.setdefault(db["Name"], (db, []))[1].append(position)
+
+            results = [None] * len(queries)
+            if not groups:
+                return results
+            with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+                list(executor.map(
+                    self.tracer.wrap(lambda group: self._execute_select_group(*group, queries, results)),
+                    groups.values()))
+            return results
+
+    def _execute_select_group(self, db, positions, queries, results):
+        """
+        Run the queries at the given positions over one connection to a database and store their results.
+        """
+        conn_str = self._parse_connection_string(db["ConnectionString"])
+        try:
+            with self.tracer.span("connect", database=db["Name"]):
+                conn = psycopg2.connect(**conn_str)
+        except psycopg2.OperationalError as e:
+            self.logger.error(f"Failed to connect to {db['Name']}: {e}")
+            for _ in positions:
+                self.release_connection(db["Name"], 0.0, dropped=True)
+            self.update(db["Name"], status="unhealthy")
+            return
+
+        try:
+            for position in positions:
+                query, params = queries[position]
+                started = time.monotonic()
+                dropped = False
+                try:
+                    with conn.cursor() as cursor:
+                        with self.tracer.span("execute", database=db["Name"]):
+                            cursor.execute(query, params)
+                        with self.tracer.span("fetch", database=db["Name"]):
+                            results[position] = cursor.fetchall()
+                except Exception as e:
+                    dropped = True
+                    self.logger.error(f"Error executing SELECT on {db['Name']}: {e}")
+                    # A failed statement aborts the transaction the rest of the group runs in
+                    conn.rollback()
+                finally:
+                    self.release_connection(db["Name"], time.monotonic() - started, dropped)
+        finally:
+            conn.close()
+
+    def execute_non_select_query(self, query, params=None):
+        """
+        Execute a write query on all active databases.
+        :return: Number of affected rows, or None if the query did not succeed anywhere.
+        """
+        with self.tracer.span("write", query=query):
+            return self._execute_write(query, params)
+
+    def _execute_write(self, query, params=None):
+        if self.atomic_writes:
+            return self._execute_atomic(query, params)
+        if self.write_coalescer:
+            try:
+                return self.write_coalescer.submit(query, params)
+            except Exception as e:
+                self.logger.error(f"Error executing coalesced query: {e}")
+                return None
+
+        rowcount = None
+        for db in self.write_databases():
             conn_str = self._parse_connection_string(db["ConnectionString"])
             conn = None
             try:
-                conn = psycopg2.connect(**conn_str)
+                with self.tracer.span("connect", database=db["Name"]):
+                    conn = psycopg2.connect(**conn_str)
                 with conn.cursor() as cursor:
-                    cursor.execute(query)
-                    conn.commit()
+                    with self.tracer.span("execute", database=db["Name"]):
+                        cursor.execute(query, params)
+                    with self.tracer.span("commit", database=db["Name"]):
+                        conn.commit()
+                    if rowcount is None:
+                        rowcount = cursor.rowcount
+                    self.logger.info(f"Query executed on active database {db['Name']}")
+                    self.reset_sequences()
             except Exception as e:
-                # self.logger.error(f"Error resetting sequence in database {db['Name']}: {e}")
-                pass
+                self.logger.error(f"Error executing query on database {db['Name']}: {e}")
             finally:
                 if conn:
                     conn.close()
+        return rowcount
 
-    def execute_select(self, query, params=None):
-        conn, db_name = self.get_connection()
-        if conn:
-            try:
-                with conn.cursor() as cursor:
+    def _execute_atomic(self, query, params=None):
+        """
+        Execute a query on all active databases with two-phase commit.
+        The query is prepared on every database in parallel and committed only if all of them
+        succeeded; otherwise every prepared transaction is rolled back.
+        :return: Number of affected rows, or None if the transaction was aborted.
+        """
+        databases = self.write_databases()
+        if not databases:
+            self.logger.error("No active databases available.")
+            return None
+
+        gtrid = f"{self.TPC_PREFIX}{uuid.uuid4().hex}"
+        with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+            prepared = list(executor.map(
+                self.tracer.wrap(lambda db: self._prepare_transaction(db, gtrid, query, params)), databases))
+
+        connections = [(db, conn) for db, (conn, _) in zip(databases, prepared) if conn]
+        if len(connections) < len(databases):
+            self.logger.error(f"Aborting transaction {gtrid}: not all databases prepared it.")
+            with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+                list(executor.map(self.tracer.wrap(lambda item: self._finish_transaction(*item, gtrid, commit=False)),
+                                  connections))
+            return None
+
+        self._record_commit_decision(gtrid)
+        with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+            list(executor.map(self.tracer.wrap(lambda item: self._finish_transaction(*item, gtrid, commit=True)),
+                              connections))
+        self.logger.info(f"Transaction {gtrid} committed on {len(connections)} databases.")
+        self.reset_sequences()
+        return prepared[0][1]
+
+    def _prepare_transaction(self, db, gtrid, query, params):
+        """
+        Execute a query inside a two-phase transaction and prepare it.
+        :return: Tuple (connection, rowcount), or (None, None) if the database failed.
+        """
+        conn_str = self._parse_connection_string(db["ConnectionString"])
+        conn = None
+        try:
+            with self.tracer.span("connect", database=db["Name"]):
+                conn = psycopg2.connect(**conn_str)
+            conn.tpc_begin(conn.xid(0, gtrid, db["Name"]))
+            with conn.cursor() as cursor:
+                with self.tracer.span("execute", database=db["Name"]):
                     cursor.execute(query, params)
-                    result = cursor.fetchall()
-                    return result
-            except Exception as e:
-                self.logger.error(f"Error executing SELECT on {db_name}: {e}")
-            finally:
+                rowcount = cursor.rowcount
+            with self.tracer.span("prepare", database=db["Name"]):
+                conn.tpc_prepare()
+            return conn, rowcount
+        except Exception as e:
+            self.logger.error(f"Error preparing transaction {gtrid} on database {db['Name']}: {e}")
+            if conn:
+                try:
+                    conn.tpc_rollback()
+                except psycopg2.Error:
+                    pass
                 conn.close()
+            return None, None
 
-    def execute_non_select_query(self, query, params=None):
-        for db in self.active_databases:
+    def _finish_transaction(self, db, conn, gtrid, commit):
+        """
+        Commit or roll back a prepared transaction and close its connection.
+        A failed attempt is retried in the background, since the prepared transaction keeps its locks.
+        """
+        try:
+            with self.tracer.span("commit" if commit else "rollback", database=db["Name"]):
+                if commit:
+                    conn.tpc_commit()
+                else:
+                    conn.tpc_rollback()
+        except psycopg2.Error as e:
+            self.logger.error(f"Error finishing prepared transaction {gtrid} on database {db['Name']}: {e}")
+            Thread(target=self._retry_finish_transaction, args=(db, gtrid, commit),
+                   name="TPCRetry", daemon=True).start()
+        finally:
+            conn.close()
+
+    def _retry_finish_transaction(self, db, gtrid, commit):
+        """
+        Retry COMMIT PREPARED or ROLLBACK PREPARED over a new connection until it succeeds
+        or the transaction no longer exists.
+        """
+        while True:
+            time.sleep(self.tpc_retry_delay)
             conn_str = self._parse_connection_string(db["ConnectionString"])
             conn = None
             try:
                 conn = psycopg2.connect(**conn_str)
-                with conn.cursor() as cursor:
-                    cursor.execute(query, params)
-                    conn.commit()
-                    self.logger.info(f"Query executed on active database {db['Name']}")
-                    self.reset_sequences()
-            except Exception as e:
-                self.logger.error(f"Error executing query on database {db['Name']}: {e}")
+                xid = conn.xid(0, gtrid, db["Name"])
+                if commit:
+                    conn.tpc_commit(xid)
+                else:
+                    conn.tpc_rollback(xid)
+                self.logger.info(f"Finished prepared transaction {gtrid} on database {db['Name']} after a retry.")
+                return
+            except psycopg2.errors.UndefinedObject:
+                # Already resolved, e.g. by recover_prepared_transactions
+                return
+            except psycopg2.Error as e:
+                self.logger.warning(f"Retrying prepared transaction {gtrid} on database {db['Name']}: {e}")
             finally:
                 if conn:
                     conn.close()
 
-    def synchronize_tables(self, table_name):
+    def _record_commit_decision(self, gtrid):
+        with self.tracer.span("commit_decision"), self.tpc_log_lock:
+            with open(self.tpc_log_file, 'a') as file:
+                file.write(f"{gtrid} {time.time()}\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _load_commit_decisions(self):
         """
-        Synchronize data in a specified table across all active databases.
-        The database with the most consistent data across all databases is used as the source.
-        :param table_name: Name of the table to synchronize.
+        :return: Dictionary mapping committed gtrids to the time their decision was recorded.
         """
-        if not self.active_databases:
-            self.logger.warning("No active databases to synchronize.")
-            return
+        if not os.path.exists(self.tpc_log_file):
+            return {}
+        decisions = {}
+        with open(self.tpc_log_file, 'r') as file:
+            for line in file:
+                parts = line.split()
+                if parts:
+                    decisions[parts[0]] = float(parts[1]) if len(parts) > 1 else 0.0
+        return decisions
 
-        # Step 1: Fetch column information and data from all active databases
-        database_data = {}
-        table_columns = None
-        for db in self.active_databases:
+    def _prepared_age(self, xid):
+        if xid.prepared is None:
+            return float("inf")
+        return (datetime.now(timezone.utc) - xid.prepared).total_seconds()
+
+    def recover_prepared_transactions(self):
+        """
+        Resolve in-doubt two-phase transactions left by a previous run.
+        Transactions with a recorded commit decision are committed. Others are rolled back once they are
+        older than the grace period; younger ones may belong to another instance that is still running.
+        Once every configured database has been checked, old decisions are dropped from the log.
+        """
+        committed = self._load_commit_decisions()
+        all_checked = True
+        deferred = False
+        for db in self.databases:
             conn_str = self._parse_connection_string(db["ConnectionString"])
             conn = None
             try:
                 conn = psycopg2.connect(**conn_str)
-                with conn.cursor() as cursor:
-                    # Fetch column information
-                    if table_columns is None:
-                        cursor.execute(f"""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name = %s
-                        ORDER BY ordinal_position;
-                        """, (table_name,))
-                        columns = cursor.fetchall()
-                        if not columns:
-                            self.logger.warning(f"Table '{table_name}' does not exist in database '{db['Name']}'.")
-                            return
-                        table_columns = [col[0] for col in columns]
-
-                    cursor.execute(f"SELECT * FROM {table_name} ORDER BY {table_columns[0]};")
-                    data = cursor.fetchall()
-                    database_data[db["Name"]] = data
+                for xid in conn.tpc_recover():
+                    if xid.database != conn.info.dbname or not str(xid.gtrid).startswith(self.TPC_PREFIX):
+                        continue
+                    if xid.gtrid in committed:
+                        conn.tpc_commit(xid)
+                        self.logger.info(f"Committed in-doubt transaction {xid.gtrid} on database {db['Name']}.")
+                    elif self._prepared_age(xid) < self.tpc_grace_period:
+                        deferred = True
+                        self.logger.info(f"Leaving recent prepared transaction {xid.gtrid} on database {db['Name']}.")
+                    else:
+                        conn.tpc_rollback(xid)
+                        self.logger.info(f"Rolled back in-doubt transaction {xid.gtrid} on database {db['Name']}.")
             except psycopg2.Error as e:
-                self.logger.warning(f"Error fetching data from database '{db['Name']}': {e}")
+                all_checked = False
+                self.logger.warning(f"Could not recover prepared transactions on database {db['Name']}: {e}")
             finally:
                 if conn:
                     conn.close()
 
-        if not database_data:
-            self.logger.warning(f"No valid data fetched for table '{table_name}' from active databases.")
-            return
+        if all_checked and committed:
+            # Keep recent decisions: another instance may be about to commit them
+            cutoff = time.time() - self.tpc_grace_period
+            with self.tpc_log_lock:
+                decisions = self._load_commit_decisions()
+                with open(self.tpc_log_file, 'w') as file:
+                    for gtrid, recorded in decisions.items():
+                        if recorded >= cutoff:
+                            file.write(f"{gtrid} {recorded}\n")
 
-        # Step 2: Determine the most consistent database (by comparing data sets)
-        reference_db_name = None
-        max_matches = 0
-        for db_name, data in database_data.items():
-            matches = sum(
-                1 for other_db, other_data in database_data.items() if db_name != other_db and data == other_data
-            )
-            if matches > max_matches:
-                max_matches = matches
-                reference_db_name = db_name
-
-        if not reference_db_name:
-            self.logger.error(
-                f"Failed to determine the most consistent database for synchronization of '{table_name}'.")
-            return
+        if deferred:
+            # Check the recent ones again once they are old enough to be orphaned
+            timer = Timer(self.tpc_grace_period, self.recover_prepared_transactions)
+            timer.daemon = True
+            timer.start()
+
+    def synchronize_tables(self, table_name, target_databases=None, max_rows_per_second=None, batch_size=500,
+                           key_columns=None, disable_triggers=False):
+        """
+        Synchronize data in a specified table across databases.
+        Every database computes a digest of its table on the server side, and the active
+        database backed by the majority of digests is used as the source. Only target databases
+        whose digest differs from the source are rewritten.
+        :param table_name: Name of the table to synchronize.
+        :param target_databases: Databases to bring up to date; defaults to all active databases.
+        :param max_rows_per_second: Limit of rows copied per second; None disables throttling.
+        :param batch_size: Number of rows read from the source and written to the targets at once.
+        :param key_columns: Primary key columns of the table; defaults to the first column. An empty
+                            list means the table has no key and rows are ordered by all columns.
+        :param disable_triggers: Rewrite targets with session_replication_role = replica, so foreign keys
+                                 and triggers do not fire while the table is replaced.
+        :return: Dictionary with the source, synchronized and failed databases and the number of rows
+                 copied, or None if no source could be determined.
+        """
+        if not self.active_databases:
+            self.logger.warning("No active databases to synchronize.")
+            return None
+
+        # Step 1: Fetch column information from the first reachable database
+        table_columns = self._fetch_table_columns(table_name)
+        if not table_columns:
+            return None
+        if key_columns is None:
+            key_columns = table_columns[:1]
 
-        reference_data = database_data[reference_db_name]
+        # Step 2: Collect a digest of the table from every database in parallel
+        candidates = list(self.active_databases)
+        targets = candidates if target_databases is None else list(target_databases)
+        databases = candidates + [db for db in targets if db not in candidates]
+        with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+            results = executor.map(lambda db: self._fetch_table_digest(db, table_name, key_columns), databases)
+            digests = {db["Name"]: digest for db, digest in zip(databases, results) if digest is not None}
+
+        candidate_digests = {db["Name"]: digests[db["Name"]] for db in candidates if db["Name"] in digests}
+        if not candidate_digests:
+            self.logger.warning(f"No valid data fetched for table '{table_name}' from active databases.")
+            return None
+
+        # Step 3: Determine the most consistent active database by a majority vote over digests
+        reference_db_name = self._elect_reference_database(candidate_digests)
+        reference_digest = digests[reference_db_name][0]
         self.logger.info(
             f"Database '{reference_db_name}' selected as the source for synchronizing table '{table_name}'.")
 
-        # Step 3: Update all other active databases
+        stale_databases = [
+            db for db in targets
+            if db["Name"] != reference_db_name
+            and (db["Name"] not in digests or digests[db["Name"]][0] != reference_digest)
+        ]
+        if not stale_databases:
+            self.logger.info(f"Table '{table_name}' is already consistent across databases.")
+            return {"source": reference_db_name, "synchronized": [], "failed": [], "rows": 0}
+
+        # Step 4: Stream the source table into all databases that diverge from it
+        reference_db = next(db for db in candidates if db["Name"] == reference_db_name)
+        return self._copy_table(reference_db, stale_databases, table_name, table_columns, key_columns,
+                                max_rows_per_second, batch_size, disable_triggers)
+
+    def _copy_table(self, reference_db, stale_databases, table_name, table_columns, key_columns,
+                    max_rows_per_second, batch_size, disable_triggers=False):
+        """
+        Bring a table in the stale databases up to the rows of the reference database.
+        Rows are read in key order, batch by batch. With a key, every batch is upserted and the target rows
+        missing from the source within the batch's key range are deleted, each batch in its own short
+        transaction on both sides, so neither the reference database nor writes reaching a catching-up
+        database wait for the whole copy; rows changed during the copy are repaired by the next
+        verification round. Tables without a key are replaced in a single transaction.
+        """
+        report = {"source": reference_db["Name"], "synchronized": [], "failed": [], "rows": 0}
+        table = sql.Identifier(table_name)
+        insert_query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+            table, self._column_list(table_columns), sql.SQL(', ').join([sql.Placeholder()] * len(table_columns)))
+        if key_columns:
+            other_columns = [col for col in table_columns if col not in key_columns]
+            insert_query += sql.SQL(" ON CONFLICT ({}) ").format(self._column_list(key_columns))
+            if other_columns:
+                insert_query += sql.SQL("DO UPDATE SET {} WHERE ({}) IS DISTINCT FROM ({})").format(
+                    sql.SQL(', ').join([sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(col))
+                                        for col in other_columns]),
+                    self._column_list(other_columns, table),
+                    self._column_list(other_columns, sql.SQL("EXCLUDED")))
+            else:
+                insert_query += sql.SQL("DO NOTHING")
+        key_positions = [table_columns.index(col) for col in key_columns]
+        source_conn = None
+        batches = None
+        target_conns = {}
+        try:
+            for db in stale_databases:
+                conn = None
+                try:
+                    conn = psycopg2.connect(**self._parse_connection_string(db["ConnectionString"]))
+                    if not key_columns:
+                        if disable_triggers:
+                            self._disable_triggers(conn, db["Name"])
+                        with conn.cursor() as cursor:
+                            cursor.execute(sql.SQL("DELETE FROM {};").format(table))
+                    target_conns[db["Name"]] = conn
+                except psycopg2.Error as e:
+                    self.logger.warning(f"Error synchronizing database '{db['Name']}' for table '{table_name}': {e}")
+                    report["failed"].append(db["Name"])
+                    if conn:
+                        conn.close()
+
+            source_conn = psycopg2.connect(**self._parse_connection_string(reference_db["ConnectionString"]))
+            started = time.monotonic()
+            previous_key = None
+            batches = self._read_source_batches(source_conn, table_name, table_columns, key_columns, batch_size)
+            for rows in batches:
+                if not target_conns:
+                    break
+                keys = [tuple(row[position] for position in key_positions) for row in rows]
+                for db_name, conn in list(target_conns.items()):
+                    try:
+                        if key_columns and disable_triggers:
+                            self._disable_triggers(conn, db_name)
+                        with conn.cursor() as cursor:
+                            if rows:
+                                execute_batch(cursor, insert_query, rows)
+                            if key_columns:
+                                self._delete_missing_rows(cursor, table_name, key_columns, previous_key, keys)
+                        if key_columns:
+                            conn.commit()
+                    except psycopg2.Error as e:
+                        self.logger.warning(
+                            f"Error synchronizing database '{db_name}' for table '{table_name}': {e}")
+                        report["failed"].append(db_name)
+                        conn.close()
+                        del target_conns[db_name]
+                if not rows:
+                    break
+                previous_key = keys[-1]
+                report["rows"] += len(rows)
+                # With a key, throttling happens between batches, when no transaction is open on either side
+                self._throttle(report["rows"], started, max_rows_per_second)
+
+            for db_name, conn in target_conns.items():
+                try:
+                    conn.commit()
+                    self._reset_table_sequences(conn, table_name)
+                    report["synchronized"].append(db_name)
+                    self.logger.info(
+                        f"Synchronized database '{db_name}' with data from '{reference_db['Name']}' "
+                        f"for table '{table_name}'.")
+                except psycopg2.Error as e:
+                    self.logger.warning(f"Error synchronizing database '{db_name}' for table '{table_name}': {e}")
+                    report["failed"].append(db_name)
+        except psycopg2.Error as e:
+            self.logger.warning(f"Error reading table '{table_name}' from database '{reference_db['Name']}': {e}")
+            report["failed"].extend(name for name in target_conns if name not in report["synchronized"])
+        finally:
+            if batches:
+                batches.close()
+            if source_conn:
+                source_conn.close()
+            for conn in target_conns.values():
+                conn.close()
+        return report
+
+    def _read_source_batches(self, source_conn, table_name, table_columns, key_columns, batch_size):
+        """
+        Yield the rows of the source table in key order, batch by batch, ending with an empty batch.
+        With a key every batch is a separate autocommitted query for the rows after the last key read,
+        so the reference database keeps no snapshot open between batches. Without a key the rows come
+        from a server-side cursor inside one transaction.
+        """
+        table = sql.Identifier(table_name)
+        columns = self._column_list(table_columns, sql.SQL("t"))
+        order_by = self._order_by(key_columns)
+        if not key_columns:
+            with source_conn.cursor(name="lb_synchronize") as source:
+                source.itersize = batch_size
+                source.execute(sql.SQL("SELECT {} FROM {} t ORDER BY {};").format(columns, table, order_by))
+                while True:
+                    rows = source.fetchmany(batch_size)
+                    yield rows
+                    if not rows:
+                        return
+
+        source_conn.autocommit = True
+        key_positions = [table_columns.index(col) for col in key_columns]
+        previous_key = None
+        while True:
+            condition = sql.SQL("TRUE")
+            params = [batch_size]
+            if previous_key is not None:
+                condition = sql.SQL("({}) > %s").format(self._column_list(key_columns, sql.SQL("t")))
+                params.insert(0, previous_key)
+            with source_conn.cursor() as source:
+                source.execute(sql.SQL("SELECT {} FROM {} t WHERE {} ORDER BY {} LIMIT %s;").format(
+                    columns, table, condition, order_by), params)
+                rows = source.fetchall()
+            yield rows
+            if not rows:
+                return
+            previous_key = tuple(rows[-1][position] for position in key_positions)
+
+    def _delete_missing_rows(self, cursor, table_name, key_columns, previous_key, keys):
+        """
+        Delete target rows whose key lies after previous_key and up to the last key of the batch
+        but is not in the batch. The final (empty) batch deletes every row after previous_key.
+        """
+        key = sql.SQL("({})").format(self._column_list(key_columns))
+        conditions = []
+        params = []
+        if previous_key is not None:
+            conditions.append(sql.SQL("{} > %s").format(key))
+            params.append(previous_key)
+        if keys:
+            conditions.append(sql.SQL("{0} <= %s AND {0} NOT IN %s").format(key))
+            params.extend([keys[-1], tuple(keys)])
+        cursor.execute(sql.SQL("DELETE FROM {} WHERE {};").format(
+            sql.Identifier(table_name), sql.SQL(" AND ").join(conditions or [sql.SQL("TRUE")])), params)
+
+    def _reset_table_sequences(self, conn, table_name):
+        """
+        Move the sequences owned by a table's serial and identity columns past the copied keys,
+        so the next INSERT fanned out to this database generates the same ids as on the others.
+        """
+        with conn.cursor() as cursor:
+            cursor.execute("""
+            SELECT a.attname, pg_get_serial_sequence(quote_ident(n.nspname) || '.' || quote_ident(c.relname), a.attname)
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = current_schema() AND a.attnum > 0 AND NOT a.attisdropped;
+            """, (table_name,))
+            for column, sequence in cursor.fetchall():
+                if sequence is None:
+                    continue
+                cursor.execute(sql.SQL(
+                    "SELECT setval(%s, GREATEST(COALESCE(max({0}), 0), 1), max({0}) IS NOT NULL) FROM {1};").format(
+                    sql.Identifier(column), sql.Identifier(table_name)), (sequence,))
+        conn.commit()
+
+    def _column_list(self, columns, prefix=None):
+        if prefix is None:
+            return sql.SQL(', ').join(map(sql.Identifier, columns))
+        return sql.SQL(', ').join(sql.SQL("{}.{}").format(prefix, sql.Identifier(col)) for col in columns)
+
+    def _order_by(self, key_columns):
+        """Order rows by their key, or by their text form when the table has no key."""
+        if not key_columns:
+            return sql.SQL("t::text")
+        return self._column_list(key_columns, sql.SQL("t"))
+
+    def _disable_triggers(self, conn, db_name):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SET LOCAL session_replication_role = replica;")
+        except psycopg2.Error as e:
+            conn.rollback()
+            self.logger.warning(f"Could not disable triggers in database '{db_name}': {e}")
+
+    def _throttle(self, rows_copied, started, max_rows_per_second):
+        if not max_rows_per_second:
+            return
+        delay = rows_copied / max_rows_per_second - (time.monotonic() - started)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fetch_table_columns(self, table_name):
+        """
+        Fetch the ordered column names of a table from the first reachable active database.
+        :param table_name: Name of the table.
+        :return: List of column names, or None if the table could not be described.
+        """
         for db in self.active_databases:
-            if db["Name"] == reference_db_name:
-                continue  # Skip the source database
             conn_str = self._parse_connection_string(db["ConnectionString"])
             conn = None
             try:
                 conn = psycopg2.connect(**conn_str)
                 with conn.cursor() as cursor:
-                    cursor.execute(f"DELETE FROM {table_name};")
-
-                    insert_query = f"""
-                    INSERT INTO {table_name} ({', '.join(table_columns)}) 
-                    VALUES ({', '.join(['%s'] * len(table_columns))})
-                    ON CONFLICT ({table_columns[0]}) 
-                    DO UPDATE SET {', '.join([f"{col} = EXCLUDED.{col}" for col in table_columns[1:]])};
-                    """
-                    for row in reference_data:
-                        cursor.execute(insert_query, row)
-                    conn.commit()
-                self.logger.info(
-                    f"Synchronized database '{db['Name']}' with data from '{reference_db_name}' for table '{table_name}'.")
+                    cursor.execute("""
+                    SELECT column_name 
+                    FROM information_schema.columns 
+                    WHERE table_name = %s AND table_schema = current_schema()
+                    ORDER BY ordinal_position;
+                    """, (table_name,))
+                    columns = cursor.fetchall()
+                if not columns:
+                    self.logger.warning(f"Table '{table_name}' does not exist in database '{db['Name']}'.")
+                    return None
+                return [col[0] for col in columns]
             except psycopg2.Error as e:
-                self.logger.warning(f"Error synchronizing database '{db['Name']}' for table '{table_name}': {e}")
+                self.logger.warning(f"Error fetching columns from database '{db['Name']}': {e}")
             finally:
                 if conn:
                     conn.close()
+        return None
+
+    def _fetch_table_digest(self, db, table_name, key_columns):
+        """
+        Compute a digest of the table inside Postgres: the row count and the sum of the first 64 bits
+        of every row's md5. The aggregate is a single number whatever the table size and needs no sort.
+        :param db: Database configuration.
+        :param table_name: Name of the table.
+        :param key_columns: Key columns of the table; the largest value of the first one is reported as
+                            the max key. Without key columns no max key is reported.
+        :return: Tuple (digest, row_count, max_key), or None if the database could not be queried.
+        """
+        max_key = sql.SQL("NULL")
+        if key_columns:
+            max_key = sql.SQL("max(t.{})").format(sql.Identifier(key_columns[0]))
+        query = sql.SQL("""
+        SELECT count(*) || ':' || COALESCE(sum(('x' || substr(md5(t::text), 1, 16))::bit(64)::bigint), 0),
+               count(*),
+               {}
+        FROM {} t;
+        """).format(max_key, sql.Identifier(table_name))
+        conn_str = self._parse_connection_string(db["ConnectionString"])
+        conn = None
+        try:
+            conn = psycopg2.connect(**conn_str)
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchone()
+        except psycopg2.Error as e:
+            self.logger.warning(f"Error fetching digest from database '{db['Name']}': {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+    def _elect_reference_database(self, digests):
+        """
+        Pick the synchronization source by a majority vote over table digests.
+        Without a strict majority the largest group wins; ties are broken by the freshest
+        max key, then the row count, then the database name, so the choice is deterministic.
+        :param digests: Dictionary mapping database name to (digest, row_count, max_key).
+        :return: Name of the reference database.
+        """
+        groups = {}
+        for db_name, (digest, _, _) in digests.items():
+            groups.setdefault(digest, []).append(db_name)
+
+        def rank(digest):
+            members = groups[digest]
+            _, row_count, max_key = digests[members[0]]
+            return len(members), max_key is not None, max_key if max_key is not None else 0, row_count
+
+        best_digest = max(sorted(groups, key=lambda digest: min(groups[digest])), key=rank)
+        if len(groups[best_digest]) * 2 <= len(digests):
+            self.logger.warning("No majority among table digests. Falling back to the freshest database.")
+        return min(groups[best_digest])
 
     def _parse_connection_string(self, conn_string):
         params = {}
@@ -234,11 +908,46 @@ class LoadBalancer(Observer):
     def update(self, database_name, status):
         if status == "unhealthy":
             self.logger.warning(f"Database {database_name} marked as unhealthy. Excluding from load balancing.")
-            self.active_databases = [db for db in self.active_databases if db["Name"] != database_name]
+            with self.membership_lock:
+                self.active_databases = [db for db in self.active_databases if db["Name"] != database_name]
+                self.catching_up_databases = [
+                    db for db in self.catching_up_databases if db["Name"] != database_name]
         elif status == "healthy":
-            if database_name not in [db["Name"] for db in self.active_databases]:
-                self.logger.info(f"Database {database_name} marked as healthy. Including in load balancing.")
+            with self.membership_lock:
+                known = [db["Name"] for db in self.active_databases + self.catching_up_databases]
                 db_to_add = next((db for db in self.databases if db["Name"] == database_name), None)
-                if db_to_add:
+                if database_name in known or not db_to_add:
+                    return
+                if not self.active_databases:
+                    # Nothing to catch up from, so the database becomes the source of truth
                     self.active_databases.append(db_to_add)
-                    self.synchronize_tables(self.table_name)
+                    self.logger.info(f"Database {database_name} marked as healthy. Including in load balancing.")
+                    return
+                self.catching_up_databases.append(db_to_add)
+            self.logger.info(f"Database {database_name} marked as healthy. Catching up before serving reads.")
+            self.recovery_worker.schedule(database_name)
+
+    def get_catching_up_database(self, database_name):
+        """
+        :return: Configuration of a database that is catching up, or None if it is not.
+        """
+        with self.membership_lock:
+            return next((db for db in self.catching_up_databases if db["Name"] == database_name), None)
+
+    def promote_database(self, database_name):
+        """
+        Move a database that has caught up into the active databases, so it starts serving reads.
+        """
+        with self.membership_lock:
+            db = next((db for db in self.catching_up_databases if db["Name"] == database_name), None)
+            if db is None:
+                return
+            self.catching_up_databases = [db for db in self.catching_up_databases if db["Name"] != database_name]
+            self.active_databases = self.active_databases + [db]
+        self.logger.info(f"Database {database_name} caught up. Including in load balancing.")
+        self.reset_sequences()
+
+    def update_load(self, database_name, load):
+        self.load_signals[database_name] = load
+        if hasattr(self.strategy, "update_load"):
+            self.strategy.update_load(database_name, load)
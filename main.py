@@ -36,7 +36,7 @@ def main():
     health_checker.add_observer(load_balancer)
     health_checker.check_health()
 
-    load_balancer.synchronize_tables(load_balancer.table_name)
+    load_balancer.sync_engine.synchronize_all()
     load_balancer.reset_sequences()
 
     try:
@@ -56,7 +56,7 @@ def main():
             if choice == "1":
                 user_id = input("Podaj ID użytkownika: ")
                 query = "SELECT * FROM users WHERE id = %s;"
-                results = load_balancer.execute_select(query, (user_id,))
+                results = load_balancer.execute(query, (user_id,))
                 if results:
                     for row in results:
                         print(f"ID: {row[0]}, Name: {row[1]}, Email: {row[2]}")
@@ -65,7 +65,7 @@ def main():
 
             elif choice == "2":
                 query = "SELECT * FROM users ORDER BY id;"
-                results = load_balancer.execute_select(query)
+                results = load_balancer.execute(query)
                 for row in results:
                     print(f"ID: {row[0]}, Name: {row[1]}, Email: {row[2]}")
 
@@ -83,7 +83,7 @@ def main():
                     print("Nieprawidłowy format email.")
 
                 query = "INSERT INTO users (name, email) VALUES (%s, %s);"
-                load_balancer.execute_non_select_query(query, (name, email))
+                load_balancer.execute(query, (name, email))
                 print("Dodano nowego użytkownika.")
 
             elif choice == "4":
@@ -91,29 +91,19 @@ def main():
                 random_name = " ".join(["".join(random.choices(chars, k=5)).capitalize() for _ in range(2)])
                 random_email = f"{random_name.split()[0].lower()}@example.com"
                 query = "INSERT INTO users (name, email) VALUES (%s, %s);"
-                load_balancer.execute_non_select_query(query, (random_name, random_email))
+                load_balancer.execute(query, (random_name, random_email))
                 print(f"Dodano losowego użytkownika: {random_name}, {random_email}")
 
             elif choice == "5":
                 user_id = input("Podaj ID użytkownika do usunięcia: ")
-                query_check = "SELECT 1 FROM users WHERE id = %s LIMIT 1;"
-                results = load_balancer.execute_select(query_check, (user_id,))
-                if not results:
+                query = "DELETE FROM users WHERE id = %s;"
+                if not load_balancer.execute(query, (user_id,)):
                     print(f"Użytkownik o ID {user_id} nie istnieje.")
                     continue
-
-                query = "DELETE FROM users WHERE id = %s;"
-                load_balancer.execute_non_select_query(query, (user_id,))
                 print(f"Użytkownik o ID {user_id} został usunięty.")
 
             elif choice == "6":  # UPDATE
                 user_id = input("Podaj ID użytkownika do zaktualizowania: ")
-                query_check = "SELECT 1 FROM users WHERE id = %s LIMIT 1;"
-                results = load_balancer.execute_select(query_check, (user_id,))
-
-                if not results:
-                    print(f"Użytkownik o ID {user_id} nie istnieje.")
-                    continue
 
                 new_name = None
                 while True:
@@ -147,11 +137,13 @@ def main():
 
                 query = query.rstrip(", ") + " WHERE id = %s;"
                 params.append(user_id)
-                load_balancer.execute_non_select_query(query, params)
+                if not load_balancer.execute(query, params):
+                    print(f"Użytkownik o ID {user_id} nie istnieje.")
+                    continue
                 print(f"Użytkownik o ID {user_id} został zaktualizowany.")
 
             elif choice == "7":
-                print("Wybierz algorytm: 1 - RoundRobin, 2 - Random, 3 - LeastConnections")
+                print("Wybierz algorytm: 1 - RoundRobin, 2 - Random, 3 - LeastConnections, 4 - LeastLoaded")
                 algorithm_choice = input("Wybór: ")
                 if algorithm_choice == "1":
                     load_balancer.set_strategy("round_robin")
@@ -162,6 +154,9 @@ def main():
                 elif algorithm_choice == "3":
                     load_balancer.set_strategy("least_connections")
                     print("Algorytm zmieniony na LeastConnections.")
+                elif algorithm_choice == "4":
+                    load_balancer.set_strategy("least_loaded")
+                    print("Algorytm zmieniony na LeastLoaded.")
                 else:
                     print("Nieprawidłowy wybór algorytmu.")
 
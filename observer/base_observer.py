@@ -10,3 +10,11 @@ class Observer(ABC):
         :param status: The health status of the database (e.g., 'healthy', 'unhealthy').
         """
         pass
+
+    def update_load(self, database_name, load):
+        """
+        Update the observer with load signals of a healthy database.
+        :param database_name: Name of the database.
+        :param load: Dictionary with load signals (e.g., 'active_backends', 'connection_saturation').
+        """
+        pass
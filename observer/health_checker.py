@@ -1,21 +1,36 @@
+import time
 import psycopg2
 from threading import Timer
 from logger.singleton_logger import SingletonLogger
+from tracing.tracer import NOOP_TRACER
 
 
 class HealthChecker:
-    def __init__(self, databases, check_interval=10):
+    LOAD_QUERY = """
+    SELECT (SELECT count(*) FROM pg_stat_activity WHERE state = 'active' AND pid <> pg_backend_pid()),
+           (SELECT count(*) FROM pg_stat_activity WHERE backend_type = 'client backend'),
+           current_setting('max_connections')::int,
+           (SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database());
+    """
+
+    def __init__(self, databases, check_interval=10, probe_timeout=3, tracer=None):
         """
         Initialize the HealthChecker.
         :param databases: List of database configurations.
         :param check_interval: Time interval (in seconds) between health checks.
+        :param probe_timeout: Time (in seconds) after which a probe connection or query fails.
+        :param tracer: Tracer recording the phases of every probe; tracing is disabled by default.
         """
         self.databases = databases
         self.observers = []
         self.logger = SingletonLogger().get_logger()
         self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.tracer = tracer or NOOP_TRACER
         self.timer = None
         self.database_status = {db["Name"]: "unknown" for db in databases}
+        self.probe_connections = {}
+        self.transaction_counters = {}
 
     def add_observer(self, observer):
         """
@@ -42,6 +57,82 @@ class HealthChecker:
         for observer in self.observers:
             observer.update(database_name, status)
 
+    def notify_load(self, database_name, load):
+        """
+        Notify all observers about the load of a healthy database.
+        :param database_name: Name of the database.
+        :param load: Dictionary with load signals sampled by the probe.
+        """
+        for observer in self.observers:
+            observer.update_load(database_name, load)
+
+    def _probe_connection(self, db):
+        conn = self.probe_connections.get(db["Name"])
+        if conn is None or conn.closed:
+            conn_str = self._parse_connection_string(db["ConnectionString"])
+            with self.tracer.span("connect", database=db["Name"]):
+                conn = psycopg2.connect(
+                    connect_timeout=self.probe_timeout,
+                    options=f"-c statement_timeout={int(self.probe_timeout * 1000)}",
+                    **conn_str)
+            conn.autocommit = True
+            self.probe_connections[db["Name"]] = conn
+        return conn
+
+    def _close_probe(self, db_name):
+        conn = self.probe_connections.pop(db_name, None)
+        if conn:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+
+    def probe(self, db):
+        """
+        Check a database over its persistent probe connection and sample its load.
+        :param db: Database configuration.
+        :return: Dictionary with load signals, or an empty dictionary if they could not be sampled.
+        :raises psycopg2.Error: If the database is not reachable.
+        """
+        with self.tracer.span("probe", database=db["Name"]):
+            return self._probe(db)
+
+    def _probe(self, db):
+        try:
+            conn = self._probe_connection(db)
+            started = time.monotonic()
+            with self.tracer.span("ping", database=db["Name"]), conn.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+                cursor.fetchone()
+            latency = time.monotonic() - started
+        except psycopg2.Error:
+            self._close_probe(db["Name"])
+            raise
+
+        try:
+            with self.tracer.span("sample_load", database=db["Name"]), conn.cursor() as cursor:
+                cursor.execute(self.LOAD_QUERY)
+                active_backends, connections, max_connections, transactions = cursor.fetchone()
+        except psycopg2.Error as e:
+            self.logger.debug(f"Could not sample load of database {db['Name']}: {e}")
+            return {}
+
+        now = time.monotonic()
+        previous = self.transaction_counters.get(db["Name"])
+        self.transaction_counters[db["Name"]] = (transactions, now)
+        transaction_rate = 0.0
+        if previous and transactions is not None and previous[0] is not None and now > previous[1]:
+            transaction_rate = max(0, transactions - previous[0]) / (now - previous[1])
+
+        return {
+            "probe_latency": latency,
+            "active_backends": active_backends,
+            "connections": connections,
+            "max_connections": max_connections,
+            "connection_saturation": connections / max_connections if max_connections else 0.0,
+            "transaction_rate": transaction_rate,
+        }
+
     def initial_health_check(self):
         """
         Perform an initial health check for all databases.
@@ -49,14 +140,14 @@ class HealthChecker:
         self.logger.info("Performing initial health check...")
         for db in self.databases:
             db_name = db["Name"]
-            conn_str = self._parse_connection_string(db["ConnectionString"])
             try:
-                conn = psycopg2.connect(**conn_str)
-                conn.close()
+                load = self.probe(db)
                 self.logger.info(f"Database {db_name} is healthy.")
                 self.database_status[db_name] = "healthy"
                 self.notify_observers(db_name, "healthy")
-            except psycopg2.OperationalError:
+                if load:
+                    self.notify_load(db_name, load)
+            except psycopg2.Error:
                 self.logger.error(f"Database {db_name} is unhealthy.")
                 self.database_status[db_name] = "unhealthy"
                 self.notify_observers(db_name, "unhealthy")
@@ -66,27 +157,31 @@ class HealthChecker:
         Monitor databases and notify observers only when a status change occurs.
         """
         # self.logger.info("Monitoring database health...")
+        with self.tracer.span("health_check"):
+            self._check_databases()
+
+        # Schedule the next health check
+        self.timer = Timer(self.check_interval, self.check_health)
+        self.timer.start()
+
+    def _check_databases(self):
         for db in self.databases:
             db_name = db["Name"]
-            conn_str = self._parse_connection_string(db["ConnectionString"])
 
             try:
-                conn = psycopg2.connect(**conn_str)
-                conn.close()
+                load = self.probe(db)
                 if self.database_status[db_name] != "healthy":
                     self.logger.info(f"Database {db_name} status changed to healthy.")
                     self.database_status[db_name] = "healthy"
                     self.notify_observers(db_name, "healthy")
-            except psycopg2.OperationalError:
+                if load:
+                    self.notify_load(db_name, load)
+            except psycopg2.Error:
                 if self.database_status[db_name] != "unhealthy":
                     self.logger.error(f"Database {db_name} status changed to unhealthy.")
                     self.database_status[db_name] = "unhealthy"
                     self.notify_observers(db_name, "unhealthy")
 
-        # Schedule the next health check
-        self.timer = Timer(self.check_interval, self.check_health)
-        self.timer.start()
-
     def _parse_connection_string(self, conn_string):
         """
         Parse a connection string into a dictionary suitable for psycopg2.
@@ -104,4 +199,6 @@ class HealthChecker:
         """
         if self.timer:
             self.timer.cancel()
+        for db_name in list(self.probe_connections):
+            self._close_probe(db_name)
         self.logger.info("HealthChecker stopped.")
@@ -0,0 +1,716 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+from admission.admission_controller import LoadSheddingError
+from loadbalancer import LoadBalancer
+from logger.singleton_logger import SingletonLogger
+from observer.health_checker import HealthChecker
+from routing.sql_classifier import split_statements, READ, WRITE, TRANSACTION, SESSION
+
+PROTOCOL_VERSION = 196608
+SSL_REQUEST_CODE = 80877103
+GSSENC_REQUEST_CODE = 80877104
+CANCEL_REQUEST_CODE = 80877102
+
+PARAMETER_PATTERN = re.compile(r"\$(\d+)")
+ROLLBACK_TO_PATTERN = re.compile(r"\s*ROLLBACK\s+((WORK|TRANSACTION)\s+)?TO\b", re.I)
+PREPARED_TRANSACTION_PATTERN = re.compile(r"\s*(COMMIT|ROLLBACK)\s+PREPARED\b", re.I)
+
+# Session statements changing the connection they run on: applied to the pinned connections of a transaction
+SETTING_SESSION_KEYWORDS = {"SET", "RESET", "DISCARD"}
+SET_PATTERN = re.compile(r"\s*SET\s+(?:SESSION\s+)?(\w+)\s*(?:=|\bTO\b)\s*(.*?)\s*;?\s*$", re.I | re.S)
+SET_LOCAL_PATTERN = re.compile(r"\s*SET\s+LOCAL\b", re.I)
+# Parameters drivers set at connect time; acknowledged outside transactions without running them
+CONNECT_PARAMETERS = {"extra_float_digits", "application_name", "client_encoding"}
+# Session statements sent to every database like writes
+FANNED_OUT_SESSION_KEYWORDS = {"NOTIFY"}
+
+
+class ProxyError(Exception):
+    """Error reported to the client as an ErrorResponse."""
+
+    def __init__(self, message, code="XX000"):
+        super().__init__(message)
+        self.code = code
+
+
+class RawTextConnection(psycopg2.extensions.connection):
+    """
+    Connection returning every value as the text Postgres sent, so it can be relayed unchanged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        with self.cursor() as cursor:
+            cursor.execute("SELECT oid::int FROM pg_type;")
+            oids = tuple(row[0] for row in cursor.fetchall())
+        self.rollback()
+        psycopg2.extensions.register_type(
+            psycopg2.extensions.new_type(oids, "RAW_TEXT", lambda value, cursor: value), self)
+
+
+def to_pyformat(sql):
+    """
+    Convert $n placeholders to psycopg2 named placeholders.
+    """
+    return PARAMETER_PATTERN.sub(lambda match: f"%(p{match.group(1)})s", sql.replace("%", "%%"))
+
+
+def is_connect_parameter(name, value):
+    """
+    Check whether a SET only repeats what drivers send at connect time and does not change results.
+    """
+    name = name.lower()
+    if name not in CONNECT_PARAMETERS:
+        return False
+    if name == "client_encoding":
+        return re.sub(r"[^a-z0-9]", "", value.lower()) in ("utf8", "unicode")
+    return True
+
+
+class BackendPool:
+    def __init__(self, load_balancer, min_connections=1, max_connections=20):
+        """
+        Initialize the BackendPool.
+        :param load_balancer: LoadBalancer providing databases and the routing strategy.
+        :param min_connections: Connections opened per database when its pool is created.
+        :param max_connections: Maximum number of connections per database.
+        """
+        self.load_balancer = load_balancer
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.logger = SingletonLogger().get_logger()
+        self.pools = {}
+        self.lock = Lock()
+
+    def _pool(self, db):
+        with self.lock:
+            pool = self.pools.get(db["Name"])
+            if pool is None:
+                conn_str = self.load_balancer._parse_connection_string(db["ConnectionString"])
+                pool = ThreadedConnectionPool(
+                    self.min_connections, self.max_connections, connection_factory=RawTextConnection, **conn_str)
+                self.pools[db["Name"]] = pool
+                self.logger.info(f"Connection pool created for database {db['Name']}.")
+            return pool
+
+    def get(self, db):
+        try:
+            return self._pool(db).getconn()
+        except psycopg2.pool.PoolError as e:
+            raise ProxyError(f"Connection pool of database {db['Name']} is exhausted: {e}", "53300")
+        except psycopg2.OperationalError as e:
+            raise ProxyError(f"Could not connect to database {db['Name']}: {e}", "08006")
+
+    def put(self, db_name, conn, broken=False):
+        pool = self.pools.get(db_name)
+        if pool:
+            pool.putconn(conn, close=broken or conn.closed != 0)
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.closeall()
+        self.pools = {}
+
+
+class QueryResult:
+    def __init__(self, description=None, rows=None, tag=""):
+        self.description = description
+        self.rows = rows or []
+        self.tag = tag
+        self.position = 0
+
+
+class ProxySession:
+    def __init__(self, proxy, reader, writer):
+        self.proxy = proxy
+        self.reader = reader
+        self.writer = writer
+        self.logger = proxy.logger
+        self.statements = {}
+        self.portals = {}
+        self.pinned = {}
+        self.read_database = None
+        self.transaction_status = "I"
+        self.ignore_till_sync = False
+        self.reset_session = False
+
+    # ---- Wire encoding ----
+
+    def send(self, message_type, payload=b""):
+        self.writer.write(message_type + struct.pack("!I", len(payload) + 4) + payload)
+
+    def send_error(self, message, code="XX000"):
+        payload = b"SERROR\x00VERROR\x00C" + code.encode() + b"\x00M" + str(message).encode() + b"\x00\x00"
+        self.send(b"E", payload)
+
+    def send_ready(self):
+        self.send(b"Z", self.transaction_status.encode())
+
+    def send_row_description(self, description):
+        payload = struct.pack("!H", len(description))
+        for column in description:
+            payload += column.name.encode() + b"\x00" + struct.pack("!IhIhih", 0, 0, column.type_code, -1, -1, 0)
+        self.send(b"T", payload)
+
+    def send_rows(self, result, max_rows=0):
+        """
+        Send DataRows of a result; returns True if the portal was suspended.
+        """
+        end = len(result.rows) if max_rows <= 0 else min(len(result.rows), result.position + max_rows)
+        for row in result.rows[result.position:end]:
+            payload = struct.pack("!H", len(row))
+            for value in row:
+                if value is None:
+                    payload += struct.pack("!i", -1)
+                else:
+                    data = str(value).encode()
+                    payload += struct.pack("!i", len(data)) + data
+            self.send(b"D", payload)
+        result.position = end
+        return end < len(result.rows)
+
+    # ---- Protocol handling ----
+
+    async def read_message(self):
+        header = await self.reader.readexactly(5)
+        message_type = header[:1]
+        length = struct.unpack("!I", header[1:])[0]
+        payload = await self.reader.readexactly(length - 4)
+        return message_type, payload
+
+    async def startup(self):
+        while True:
+            length = struct.unpack("!I", await self.reader.readexactly(4))[0]
+            payload = await self.reader.readexactly(length - 4)
+            code = struct.unpack("!I", payload[:4])[0]
+            if code in (SSL_REQUEST_CODE, GSSENC_REQUEST_CODE):
+                self.writer.write(b"N")
+                await self.writer.drain()
+                continue
+            if code == CANCEL_REQUEST_CODE:
+                return False
+            if code != PROTOCOL_VERSION:
+                self.send_error(f"Unsupported frontend protocol {code >> 16}.{code & 0xFFFF}", "0A000")
+                await self.writer.drain()
+                return False
+            break
+
+        parts = payload[4:].split(b"\x00")
+        parameters = dict(zip((p.decode() for p in parts[0::2]), (p.decode() for p in parts[1::2])))
+        user = parameters.get("user", "")
+        self.logger.info(f"Proxy client connected as user '{user}'.")
+
+        if self.proxy.password is not None:
+            self.send(b"R", struct.pack("!I", 3))
+            await self.writer.drain()
+            message_type, payload = await self.read_message()
+            if message_type != b"p" or payload.rstrip(b"\x00").decode() != self.proxy.password:
+                self.send_error(f"password authentication failed for user \"{user}\"", "28P01")
+                await self.writer.drain()
+                return False
+
+        self.send(b"R", struct.pack("!I", 0))
+        for name, value in self.proxy.server_parameters(parameters).items():
+            self.send(b"S", name.encode() + b"\x00" + value.encode() + b"\x00")
+        self.send(b"K", struct.pack("!II", os.getpid(), id(self) & 0xFFFFFFFF))
+        self.send_ready()
+        await self.writer.drain()
+        return True
+
+    async def run(self):
+        try:
+            if not await self.startup():
+                return
+            while True:
+                message_type, payload = await self.read_message()
+                if message_type == b"X":
+                    break
+                if self.ignore_till_sync and message_type != b"S":
+                    continue
+                handler = self.HANDLERS.get(message_type)
+                if handler is None:
+                    self.send_error(f"Unsupported message type {message_type!r}", "08P01")
+                    self.send_ready()
+                else:
+                    try:
+                        await handler(self, payload)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        raise
+                    except Exception as e:
+                        # Report unexpected errors to the client instead of dropping the session
+                        self.logger.error(f"Error handling proxy message {message_type!r}: {e}")
+                        if message_type == b"Q":
+                            self.send_error(e)
+                            self.send_ready()
+                        else:
+                            self.fail(e)
+                if message_type in (b"Q", b"S", b"H"):
+                    await self.writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            await self.proxy.run_blocking(self.release_pinned, False)
+            self.writer.close()
+            self.logger.info("Proxy client disconnected.")
+
+    async def handle_query(self, payload):
+        sql = payload.rstrip(b"\x00").decode()
+        statements = split_statements(sql)
+        if not statements:
+            self.send(b"I")
+        for statement in statements:
+            try:
+                result = await self.proxy.run_blocking(self.execute, statement, None)
+            except ProxyError as e:
+                self.send_error(e, e.code)
+                break
+            if result.description is not None:
+                self.send_row_description(result.description)
+                self.send_rows(result)
+            self.send(b"C", result.tag.encode() + b"\x00")
+        self.send_ready()
+
+    async def handle_parse(self, payload):
+        name, rest = payload.split(b"\x00", 1)
+        query, rest = rest.split(b"\x00", 1)
+        count = struct.unpack("!H", rest[:2])[0]
+        oids = list(struct.unpack(f"!{count}I", rest[2:2 + 4 * count]))
+        query = query.decode()
+        parameter_count = max([int(n) for n in PARAMETER_PATTERN.findall(query)] + [len(oids)])
+        oids += [0] * (parameter_count - len(oids))
+        self.statements[name.decode()] = {"query": query, "oids": oids}
+        self.send(b"1")
+
+    async def handle_bind(self, payload):
+        portal, rest = payload.split(b"\x00", 1)
+        statement_name, rest = rest.split(b"\x00", 1)
+        statement = self.statements.get(statement_name.decode())
+        if statement is None:
+            return self.fail(f"prepared statement \"{statement_name.decode()}\" does not exist", "26000")
+
+        offset = 0
+        format_count = struct.unpack_from("!H", rest, offset)[0]
+        formats = struct.unpack_from(f"!{format_count}H", rest, offset + 2)
+        offset += 2 + 2 * format_count
+        parameter_count = struct.unpack_from("!H", rest, offset)[0]
+        offset += 2
+        params = {}
+        for index in range(parameter_count):
+            length = struct.unpack_from("!i", rest, offset)[0]
+            offset += 4
+            value_format = formats[index] if len(formats) > 1 else (formats[0] if formats else 0)
+            if value_format != 0:
+                return self.fail("Binary parameter format is not supported by the proxy.", "0A000")
+            if length == -1:
+                params[f"p{index + 1}"] = None
+            else:
+                params[f"p{index + 1}"] = rest[offset:offset + length].decode()
+                offset += length
+        result_format_count = struct.unpack_from("!H", rest, offset)[0]
+        result_formats = struct.unpack_from(f"!{result_format_count}H", rest, offset + 2)
+        if any(result_formats):
+            return self.fail("Binary result format is not supported by the proxy.", "0A000")
+
+        self.portals[portal.decode()] = {"query": statement["query"], "params": params, "result": None}
+        self.send(b"2")
+
+    async def handle_describe(self, payload):
+        kind, name = payload[:1], payload[1:].rstrip(b"\x00").decode()
+        if kind == b"S":
+            statement = self.statements.get(name)
+            if statement is None:
+                return self.fail(f"prepared statement \"{name}\" does not exist", "26000")
+            oids = [oid or 25 for oid in statement["oids"]]
+            self.send(b"t", struct.pack(f"!H{len(oids)}I", len(oids), *oids))
+            description = await self.proxy.run_blocking(self.describe, statement["query"], len(oids))
+        else:
+            portal = self.portals.get(name)
+            if portal is None:
+                return self.fail(f"portal \"{name}\" does not exist", "34000")
+            try:
+                description = (await self.execute_portal(portal)).description
+            except ProxyError as e:
+                return self.fail(e, e.code)
+        if description is None:
+            self.send(b"n")
+        else:
+            self.send_row_description(description)
+
+    async def handle_execute(self, payload):
+        name, rest = payload.split(b"\x00", 1)
+        max_rows = struct.unpack("!I", rest[:4])[0]
+        portal = self.portals.get(name.decode())
+        if portal is None:
+            return self.fail(f"portal \"{name.decode()}\" does not exist", "34000")
+        if not portal["query"].strip():
+            self.send(b"I")
+            return
+        try:
+            result = await self.execute_portal(portal)
+        except ProxyError as e:
+            return self.fail(e, e.code)
+        if result.description is not None and self.send_rows(result, max_rows):
+            self.send(b"s")
+            return
+        self.send(b"C", result.tag.encode() + b"\x00")
+
+    async def handle_close(self, payload):
+        kind, name = payload[:1], payload[1:].rstrip(b"\x00").decode()
+        (self.statements if kind == b"S" else self.portals).pop(name, None)
+        self.send(b"3")
+
+    async def handle_sync(self, payload):
+        self.ignore_till_sync = False
+        self.send_ready()
+
+    async def handle_flush(self, payload):
+        pass
+
+    HANDLERS = {
+        b"Q": handle_query,
+        b"P": handle_parse,
+        b"B": handle_bind,
+        b"D": handle_describe,
+        b"E": handle_execute,
+        b"C": handle_close,
+        b"S": handle_sync,
+        b"H": handle_flush,
+    }
+
+    def fail(self, message, code="XX000"):
+        self.send_error(message, code)
+        self.ignore_till_sync = True
+
+    async def execute_portal(self, portal):
+        if portal["result"] is None:
+            portal["result"] = await self.proxy.run_blocking(self.execute, portal["query"], portal["params"])
+        return portal["result"]
+
+    # ---- Query execution (runs in worker threads) ----
+
+    def execute(self, sql, params):
+        classification = self.proxy.load_balancer.classifier.classify(sql)
+        kind = classification.kind
+        if self.transaction_status == "E" and kind != TRANSACTION:
+            raise ProxyError("current transaction is aborted, commands ignored until end of transaction block",
+                             "25P02")
+        query = to_pyformat(sql) if params else sql
+        params = params or None
+
+        if kind == SESSION:
+            if classification.keyword in SETTING_SESSION_KEYWORDS:
+                return self.execute_session_setting(classification.keyword, sql, query, params)
+            if classification.keyword not in FANNED_OUT_SESSION_KEYWORDS:
+                # PREPARE/EXECUTE, LISTEN etc. would depend on a connection the next statement may not get
+                raise ProxyError(f"{classification.keyword} is not supported by the proxy: statements run on "
+                                 f"pooled connections.", "0A000")
+            kind = WRITE
+        if kind == TRANSACTION:
+            return self.execute_transaction_control(classification.keyword, query, params)
+
+        try:
+            if self.transaction_status == "T":
+                return self.execute_in_transaction(kind, query, params)
+            if kind == READ:
+                return self.execute_read(query, params)
+            return self.execute_write(query, params)
+        except ProxyError:
+            if self.transaction_status == "T":
+                self.release_pinned(False)
+                self.transaction_status = "E"
+            raise
+
+    def execute_session_setting(self, keyword, sql, query, params):
+        """
+        Run SET, RESET or DISCARD on every pinned connection of the transaction. Outside a transaction
+        the next statement may get another connection, so only the connect-time parameters of drivers
+        are acknowledged and everything else is rejected.
+        """
+        if self.transaction_status == "T":
+            if not SET_LOCAL_PATTERN.match(sql):
+                # A session-level change survives the commit and is undone before the connections go back
+                self.reset_session = True
+            try:
+                return self.execute_in_transaction(WRITE, query, params)
+            except ProxyError:
+                self.release_pinned(False)
+                self.transaction_status = "E"
+                raise
+
+        match = SET_PATTERN.match(sql) if keyword == "SET" else None
+        if match and is_connect_parameter(match.group(1), match.group(2)):
+            self.logger.debug(f"Acknowledging connect-time parameter without running it: {sql}")
+            return QueryResult(tag="SET")
+        raise ProxyError(f"{keyword} outside a transaction block is not supported by the proxy: statements run on "
+                         f"pooled connections. Use SET LOCAL inside BEGIN ... COMMIT.", "0A000")
+
+    def run_on_connection(self, conn, query, params):
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall() if cursor.description is not None else None
+            return QueryResult(cursor.description, rows, cursor.statusmessage or "")
+
+    def execute_read(self, query, params):
+        load_balancer = self.proxy.load_balancer
+        db = self.proxy.select_database()
+        conn = None
+        started = time.monotonic()
+        broken = False
+        try:
+            conn = self.proxy.pool.get(db)
+            result = self.run_on_connection(conn, query, params)
+            conn.commit()
+            return result
+        except psycopg2.Error as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not broken:
+                conn.rollback()
+            raise ProxyError(e, e.pgcode or "XX000")
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if conn:
+                self.proxy.pool.put(db["Name"], conn, broken)
+            # Always return the admission permit and the strategy's connection count
+            load_balancer.release_connection(db["Name"], time.monotonic() - started, broken)
+
+    def execute_write(self, query, params):
+        databases = self.proxy.load_balancer.write_databases()
+        if not databases:
+            raise ProxyError("No active databases available.", "08006")
+
+        def write(db):
+            conn = None
+            broken = False
+            try:
+                conn = self.proxy.pool.get(db)
+                result = self.run_on_connection(conn, query, params)
+                conn.commit()
+                return result
+            except psycopg2.Error as e:
+                broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+                if conn and not broken:
+                    conn.rollback()
+                self.logger.error(f"Error executing query on database {db['Name']}: {e}")
+                return ProxyError(e, e.pgcode or "XX000")
+            except ProxyError as e:
+                return e
+            finally:
+                if conn:
+                    self.proxy.pool.put(db["Name"], conn, broken)
+
+        with ThreadPoolExecutor(max_workers=len(databases)) as executor:
+            results = list(executor.map(write, databases))
+        successes = [result for result in results if not isinstance(result, ProxyError)]
+        if not successes:
+            raise results[0]
+        return successes[0]
+
+    def execute_transaction_control(self, keyword, query, params):
+        if keyword == "PREPARE" or PREPARED_TRANSACTION_PATTERN.match(query):
+            raise ProxyError("Two-phase commit commands are not supported by the proxy.", "0A000")
+        if keyword in ("SAVEPOINT", "RELEASE") or (keyword == "ROLLBACK" and ROLLBACK_TO_PATTERN.match(query)):
+            if self.transaction_status == "I":
+                raise ProxyError(f"{keyword} can only be used in transaction blocks", "25P01")
+            if self.transaction_status == "E":
+                raise ProxyError("Savepoints cannot be restored after a failed multi-database transaction.",
+                                 "25P02")
+            try:
+                return self.execute_in_transaction(keyword, query, params)
+            except ProxyError:
+                self.release_pinned(False)
+                self.transaction_status = "E"
+                raise
+        if keyword in ("BEGIN", "START"):
+            if self.transaction_status == "I":
+                self.pin_connections()
+                self.transaction_status = "T"
+            return QueryResult(tag="BEGIN")
+
+        committing = keyword in ("COMMIT", "END") and self.transaction_status == "T"
+        self.release_pinned(committing)
+        self.transaction_status = "I"
+        return QueryResult(tag="COMMIT" if committing else "ROLLBACK")
+
+    def pin_connections(self):
+        databases = self.proxy.load_balancer.write_databases()
+        if not databases:
+            raise ProxyError("No active databases available.", "08006")
+        try:
+            for db in databases:
+                self.pinned[db["Name"]] = self.proxy.pool.get(db)
+        except ProxyError:
+            self.release_pinned(False)
+            raise
+        # Catching-up databases take part in the transaction's writes but never serve its reads
+        load_balancer = self.proxy.load_balancer
+        readable = [db for db in databases if db in load_balancer.active_databases] or databases
+        self.read_database = load_balancer.strategy.select_database(readable)["Name"]
+
+    def execute_in_transaction(self, kind, query, params):
+        if kind == READ:
+            try:
+                return self.run_on_connection(self.pinned[self.read_database], query, params)
+            except psycopg2.Error as e:
+                raise ProxyError(e, e.pgcode or "XX000")
+
+        def write(item):
+            db_name, conn = item
+            try:
+                return self.run_on_connection(conn, query, params)
+            except psycopg2.Error as e:
+                return ProxyError(f"{db_name}: {e}", e.pgcode or "XX000")
+
+        with ThreadPoolExecutor(max_workers=len(self.pinned)) as executor:
+            results = list(executor.map(write, self.pinned.items()))
+        errors = [result for result in results if isinstance(result, ProxyError)]
+        if errors:
+            raise errors[0]
+        return results[0]
+
+    def release_pinned(self, commit):
+        """
+        Commit or roll back the pinned transaction on every database and return the connections.
+        """
+        for db_name, conn in self.pinned.items():
+            broken = False
+            try:
+                if commit:
+                    conn.commit()
+                else:
+                    conn.rollback()
+                if self.reset_session:
+                    with conn.cursor() as cursor:
+                        cursor.execute("RESET ALL;")
+                    conn.commit()
+            except psycopg2.Error as e:
+                broken = True
+                self.logger.error(f"Error finishing transaction on database {db_name}: {e}")
+            self.proxy.pool.put(db_name, conn, broken)
+        strategy = self.proxy.load_balancer.strategy
+        if self.read_database and hasattr(strategy, "release_connection"):
+            strategy.release_connection(self.read_database)
+        self.pinned = {}
+        self.read_database = None
+        self.reset_session = False
+
+    def describe(self, query, parameter_count):
+        """
+        Describe the result columns of a prepared read statement without fetching rows.
+        """
+        classification = self.proxy.load_balancer.classifier.classify(query)
+        if classification.kind != READ or classification.keyword not in ("SELECT", "VALUES", "TABLE", "WITH"):
+            return None
+        params = {f"p{index + 1}": None for index in range(parameter_count)}
+        try:
+            sql = f"SELECT * FROM ({query.rstrip().rstrip(';')}) AS described LIMIT 0"
+            result = self.execute_read(to_pyformat(sql) if params else sql, params or None)
+            return result.description
+        except ProxyError as e:
+            self.logger.debug(f"Could not describe statement: {e}")
+            return None
+
+
+class PostgresProxy:
+    def __init__(self, load_balancer, host="127.0.0.1", port=6432, password=None, max_connections=20):
+        """
+        Initialize the PostgresProxy.
+        :param load_balancer: LoadBalancer routing the queries.
+        :param host: Address to listen on.
+        :param port: Port to listen on.
+        :param password: Password required from clients; None accepts every client.
+        :param max_connections: Maximum number of pooled connections per database.
+        """
+        self.load_balancer = load_balancer
+        self.host = host
+        self.port = port
+        self.password = password
+        self.logger = SingletonLogger().get_logger()
+        self.pool = BackendPool(load_balancer, max_connections=max_connections)
+        self.executor = ThreadPoolExecutor(max_workers=max_connections)
+        self.server = None
+
+    def select_database(self):
+        load_balancer = self.load_balancer
+        if not load_balancer.active_databases:
+            raise ProxyError("No active databases available.", "08006")
+        if load_balancer.admission_controller:
+            try:
+                return load_balancer.admission_controller.acquire(
+                    load_balancer.active_databases, load_balancer.strategy.select_database)
+            except LoadSheddingError as e:
+                raise ProxyError(e, "53300")
+        return load_balancer.strategy.select_database(load_balancer.active_databases)
+
+    def server_parameters(self, startup_parameters):
+        return {
+            "server_version": "14.0",
+            "server_encoding": "UTF8",
+            "client_encoding": "UTF8",
+            "DateStyle": "ISO, MDY",
+            "integer_datetimes": "on",
+            "standard_conforming_strings": "on",
+            "TimeZone": "UTC",
+            "application_name": startup_parameters.get("application_name", ""),
+        }
+
+    async def run_blocking(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def handle_client(self, reader, writer):
+        await ProxySession(self, reader, writer).run()
+
+    async def serve(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.logger.info(f"Postgres proxy listening on {self.host}:{self.port}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        self.pool.close()
+        self.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PostgreSQL wire-protocol front-end for the load balancer.")
+    parser.add_argument("--config", default="Connection/db.json", help="Database configuration file.")
+    parser.add_argument("--table", default="users", help="Table kept in sync across databases.")
+    parser.add_argument("--strategy", default="round_robin", help="Load balancing strategy for reads.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=6432, help="Port to listen on.")
+    parser.add_argument("--password", default=None, help="Password required from clients.")
+    parser.add_argument("--max-connections", type=int, default=20, help="Pooled connections per database.")
+    parser.add_argument("--check-interval", type=int, default=15, help="Health check interval in seconds.")
+    args = parser.parse_args()
+
+    load_balancer = LoadBalancer(args.config, args.table, strategy_type=args.strategy)
+    with open(args.config, "r") as file:
+        databases = json.load(file)
+    health_checker = HealthChecker(databases, check_interval=args.check_interval)
+    health_checker.add_observer(load_balancer)
+    health_checker.check_health()
+
+    proxy = PostgresProxy(load_balancer, args.host, args.port, args.password, args.max_connections)
+    try:
+        asyncio.run(proxy.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.close()
+        health_checker.stop()
+
+
+if __name__ == "__main__":
+    main()
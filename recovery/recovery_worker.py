@@ -0,0 +1,71 @@
+import time
+from queue import Queue
+from threading import Thread
+from logger.singleton_logger import SingletonLogger
+
+
+class RecoveryWorker:
+    def __init__(self, load_balancer, max_rows_per_second=None, max_attempts=3, retry_delay=5.0):
+        """
+        Initialize the RecoveryWorker.
+        :param load_balancer: LoadBalancer owning the databases that rejoin.
+        :param max_rows_per_second: Limit of rows copied per second during synchronization; None disables it.
+        :param max_attempts: Synchronization rounds before a database is put back at the end of the queue.
+        :param retry_delay: Time (in seconds) to wait before retrying a database that did not catch up.
+        """
+        self.load_balancer = load_balancer
+        self.max_rows_per_second = max_rows_per_second
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.logger = SingletonLogger().get_logger()
+        self.queue = Queue()
+        self.thread = None
+
+    def schedule(self, database_name):
+        """
+        Queue a catching-up database for background synchronization.
+        :param database_name: Name of the database.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = Thread(target=self._run, name="RecoveryWorker", daemon=True)
+            self.thread.start()
+        self.queue.put(database_name)
+
+    def _run(self):
+        while True:
+            database_name = self.queue.get()
+            try:
+                self._recover(database_name)
+            except Exception as e:
+                self.logger.error(f"Recovery of database {database_name} failed: {e}")
+                self._retry_later(database_name)
+
+    def _recover(self, database_name):
+        """
+        Synchronize all tables of a database until their digests match the source, then promote it.
+        """
+        load_balancer = self.load_balancer
+        for attempt in range(1, self.max_attempts + 1):
+            db = load_balancer.get_catching_up_database(database_name)
+            if db is None:
+                self.logger.info(f"Database {database_name} is no longer catching up. Recovery cancelled.")
+                return
+
+            reports = load_balancer.sync_engine.synchronize_all(
+                target_databases=[db], max_rows_per_second=self.max_rows_per_second)
+            if reports is None or any(report["source"] is None or database_name in report["failed"]
+                                      for report in reports):
+                break
+            if not any(database_name in report["synchronized"] for report in reports):
+                load_balancer.promote_database(database_name)
+                return
+            self.logger.info(f"Database {database_name} synchronized (round {attempt}). Verifying.")
+
+        self._retry_later(database_name)
+
+    def _retry_later(self, database_name):
+        if self.load_balancer.get_catching_up_database(database_name) is None:
+            return
+        self.logger.warning(f"Database {database_name} has not caught up yet. Retrying in {self.retry_delay}s.")
+        time.sleep(self.retry_delay)
+        self.queue.put(database_name)
@@ -0,0 +1,240 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+READ = "read"
+WRITE = "write"
+DDL = "ddl"
+TRANSACTION = "transaction"
+SESSION = "session"
+
+Classification = namedtuple("Classification", ["kind", "keyword", "tables"])
+
+READ_KEYWORDS = {"SELECT", "SHOW", "VALUES", "TABLE", "EXPLAIN"}
+WRITE_KEYWORDS = {"INSERT", "UPDATE", "DELETE", "MERGE", "TRUNCATE", "COPY", "CALL", "DO", "VACUUM", "ANALYZE",
+                  "REFRESH", "LOCK"}
+DDL_KEYWORDS = {"CREATE", "ALTER", "DROP", "COMMENT", "GRANT", "REVOKE", "REINDEX", "CLUSTER", "SECURITY"}
+TRANSACTION_KEYWORDS = {"BEGIN", "START", "COMMIT", "END", "ROLLBACK", "ABORT", "SAVEPOINT", "RELEASE"}
+SESSION_KEYWORDS = {"SET", "RESET", "DISCARD", "LISTEN", "UNLISTEN", "NOTIFY", "PREPARE", "EXECUTE",
+                    "DEALLOCATE", "LOAD"}
+DATA_MODIFYING_KEYWORDS = {"INSERT", "UPDATE", "DELETE", "MERGE"}
+# Functions whose calls change state, so a SELECT calling them must run on every database
+SIDE_EFFECT_FUNCTIONS = {"NEXTVAL", "SETVAL", "SET_CONFIG"}
+SIDE_EFFECT_FUNCTION_PREFIXES = ("PG_ADVISORY", "PG_TRY_ADVISORY", "LO_")
+
+# Keywords after which a table name follows
+TABLE_PREFIXES = {"FROM", "JOIN", "INTO", "UPDATE", "TABLE", "TRUNCATE", "USING"}
+# Words that may sit between a table prefix and the table name
+TABLE_NAME_MODIFIERS = {"ONLY", "IF", "NOT", "EXISTS", "LATERAL", "TABLE"}
+
+# Words that end a table reference instead of naming a table or its alias
+TABLE_STOP_WORDS = {
+    "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "ON", "USING", "GROUP", "ORDER",
+    "LIMIT", "OFFSET", "HAVING", "WINDOW", "UNION", "INTERSECT", "EXCEPT", "SET", "VALUES", "SELECT",
+    "RETURNING", "FOR", "DEFAULT", "OVERRIDING", "FETCH", "WHEN", "DO", "ADD", "RENAME", "OWNER", "CASCADE",
+    "RESTRICT", "RESTART", "CONTINUE", "LATERAL", "TABLESAMPLE", "FROM", "INTO", "TABLE", "UPDATE", "DELETE",
+    "INSERT", "WITH", "AND", "OR", "NOT", "IS", "IN", "BETWEEN", "LIKE", "ILIKE", "CASE", "THEN", "ELSE", "END",
+    "ALL", "DISTINCT", "NULL", "TRUE", "FALSE", "ASC", "DESC", "NULLS", "OVER", "FILTER", "PARTITION", "AS",
+}
+
+WORD_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+DOLLAR_QUOTE_PATTERN = re.compile(r"\$[A-Za-z_]*\$")
+
+
+def tokenize(sql):
+    """
+    Split a statement into tokens, skipping comments and string literals.
+    Words are returned upper-cased; quoted identifiers are returned with their quotes.
+    :return: List of tokens.
+    """
+    tokens = []
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char.isspace():
+            i += 1
+        elif char == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end + 1
+        elif char == "/" and sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif char == "'":
+            end = _closing_quote(sql, i, "'")
+            tokens.append("'")
+            i = end
+        elif char == '"':
+            end = _closing_quote(sql, i, '"')
+            tokens.append(sql[i:end])
+            i = end
+        elif char == "$" and DOLLAR_QUOTE_PATTERN.match(sql, i):
+            tag = DOLLAR_QUOTE_PATTERN.match(sql, i).group(0)
+            end = sql.find(tag, i + len(tag))
+            tokens.append("'")
+            i = length if end == -1 else end + len(tag)
+        else:
+            match = WORD_PATTERN.match(sql, i)
+            if match:
+                tokens.append(match.group(0).upper())
+                i = match.end()
+            else:
+                tokens.append(char)
+                i += 1
+    return tokens
+
+
+def _closing_quote(sql, start, quote):
+    end = sql.find(quote, start + 1)
+    while end != -1 and sql.startswith(quote * 2, end):
+        end = sql.find(quote, end + 2)
+    return len(sql) if end == -1 else end + 1
+
+
+def split_statements(sql):
+    """
+    Split a query string into statements, ignoring semicolons in literals and comments.
+    :return: List of non-empty statements.
+    """
+    statements = []
+    start = 0
+    i = 0
+    length = len(sql)
+    while i < length:
+        char = sql[i]
+        if char in ("'", '"'):
+            i = _closing_quote(sql, i, char)
+        elif char == "-" and sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end + 1
+        elif char == "/" and sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif char == "$" and DOLLAR_QUOTE_PATTERN.match(sql, i):
+            tag = DOLLAR_QUOTE_PATTERN.match(sql, i).group(0)
+            end = sql.find(tag, i + len(tag))
+            i = length if end == -1 else end + len(tag)
+        elif char == ";":
+            statements.append(sql[start:i])
+            start = i + 1
+            i += 1
+        else:
+            i += 1
+    statements.append(sql[start:])
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def _normalize_identifier(token):
+    if token.startswith('"'):
+        return token[1:-1].replace('""', '"')
+    return token.lower()
+
+
+def _is_identifier(token):
+    return token.startswith('"') or WORD_PATTERN.fullmatch(token) is not None
+
+
+def extract_tables(tokens):
+    """
+    Extract names of the tables referenced by a tokenized statement.
+    :return: Tuple of table names in order of first appearance, without CTE names.
+    """
+    cte_names = set()
+    for index, token in enumerate(tokens[:-1]):
+        if tokens[index + 1] == "AS" and index > 0 and tokens[index - 1] in ("WITH", ",", "RECURSIVE"):
+            cte_names.add(_normalize_identifier(token))
+
+    tables = []
+    index = 0
+    while index < len(tokens):
+        if tokens[index] not in TABLE_PREFIXES:
+            index += 1
+            continue
+        index += 1
+        while True:
+            while index < len(tokens) and tokens[index] in TABLE_NAME_MODIFIERS:
+                index += 1
+            if index >= len(tokens) or not _is_identifier(tokens[index]) or tokens[index] in TABLE_STOP_WORDS:
+                break
+            name = _normalize_identifier(tokens[index])
+            index += 1
+            while index + 1 < len(tokens) and tokens[index] == "." and _is_identifier(tokens[index + 1]):
+                name += "." + _normalize_identifier(tokens[index + 1])
+                index += 2
+            if name not in cte_names and name not in tables:
+                tables.append(name)
+            # Skip an optional alias and continue with comma-separated lists (FROM a, b)
+            if index < len(tokens) and tokens[index] == "AS":
+                index += 1
+            if index < len(tokens) and _is_identifier(tokens[index]) and tokens[index] not in TABLE_STOP_WORDS:
+                index += 1
+            if index < len(tokens) and tokens[index] == ",":
+                index += 1
+                continue
+            break
+    return tuple(tables)
+
+
+def calls_side_effect_function(tokens):
+    """
+    Check whether a statement calls a function that changes state (sequences, settings, locks, large objects).
+    """
+    for token, next_token in zip(tokens, tokens[1:]):
+        if next_token == "(" and (token in SIDE_EFFECT_FUNCTIONS or token.startswith(SIDE_EFFECT_FUNCTION_PREFIXES)):
+            return True
+    return False
+
+
+def classify_tokens(tokens):
+    """
+    Classify a tokenized statement.
+    :return: Classification with the kind, the first keyword and the referenced tables.
+    """
+    words = [token for token in tokens if token != "("]
+    keyword = words[0] if words else ""
+    tables = extract_tables(tokens)
+    token_set = set(tokens)
+
+    if keyword in TRANSACTION_KEYWORDS:
+        return Classification(TRANSACTION, keyword, tables)
+    if keyword == "PREPARE" and len(words) > 1 and words[1] == "TRANSACTION":
+        return Classification(TRANSACTION, keyword, tables)
+    if keyword in SESSION_KEYWORDS:
+        return Classification(SESSION, keyword, tables)
+    if keyword in DDL_KEYWORDS:
+        return Classification(DDL, keyword, tables)
+    if keyword == "WITH":
+        kind = WRITE if token_set & DATA_MODIFYING_KEYWORDS or calls_side_effect_function(tokens) else READ
+        return Classification(kind, keyword, tables)
+    if keyword == "EXPLAIN":
+        kind = WRITE if "ANALYZE" in token_set and token_set & DATA_MODIFYING_KEYWORDS else READ
+        return Classification(kind, keyword, tables)
+    if keyword == "SELECT" and "INTO" in token_set:
+        return Classification(DDL, keyword, tables)
+    if keyword in READ_KEYWORDS:
+        kind = WRITE if keyword in ("SELECT", "VALUES") and calls_side_effect_function(tokens) else READ
+        return Classification(kind, keyword, tables)
+    if keyword in WRITE_KEYWORDS:
+        return Classification(WRITE, keyword, tables)
+    # Anything unknown is sent to every database, which is the safe choice
+    return Classification(WRITE, keyword, tables)
+
+
+class SQLClassifier:
+    def __init__(self, cache_size=1024):
+        """
+        Initialize the SQLClassifier.
+        :param cache_size: Number of distinct query texts whose classification is cached.
+        """
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def _classify(self, query):
+        """
+        Classify a statement as read, write, DDL, transaction control or session statement.
+        :param query: SQL text.
+        :return: Classification(kind, keyword, tables).
+        """
+        return classify_tokens(tokenize(query))
+
+    def cache_info(self):
+        return self.classify.cache_info()
@@ -0,0 +1,408 @@
+import argparse
+import heapq
+import logging
+import math
+import random
+import time
+from collections import deque
+from factory.strategy_factory import LoadBalancingStrategyFactory
+from logger.singleton_logger import SingletonLogger
+from workload.statistics import percentile
+
+ARRIVAL = 0
+DEPARTURE = 1
+PROBE = 2
+FAULT_START = 3
+FAULT_END = 4
+
+SERVICE_DISTRIBUTIONS = ("constant", "exponential", "lognormal", "pareto")
+
+
+class ServiceTime:
+    def __init__(self, distribution, mean, rng, sigma=1.0, alpha=2.5):
+        """
+        Initialize the ServiceTime generator.
+        :param distribution: One of 'constant', 'exponential', 'lognormal' or 'pareto'.
+        :param mean: Mean service time (in seconds) of a backend running at full speed.
+        :param rng: Random number generator.
+        :param sigma: Shape of the lognormal distribution.
+        :param alpha: Shape of the pareto distribution (heavier tail when closer to 1, must be above 1).
+        """
+        if distribution not in SERVICE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown service time distribution: {distribution}")
+        self.distribution = distribution
+        self.mean = mean
+        self.rng = rng
+        self.sigma = sigma
+        self.alpha = alpha
+
+    def sample(self):
+        if self.distribution == "constant":
+            return self.mean
+        if self.distribution == "exponential":
+            return self.rng.expovariate(1.0 / self.mean)
+        if self.distribution == "lognormal":
+            # Choose mu so that the distribution keeps the requested mean
+            mu = math.log(self.mean) - self.sigma ** 2 / 2
+            return self.rng.lognormvariate(mu, self.sigma)
+        scale = self.mean * (self.alpha - 1) / self.alpha
+        return scale * self.rng.paretovariate(self.alpha)
+
+
+class ArrivalProcess:
+    def __init__(self, rate, rng, kind="poisson", burst_factor=5.0, burst_length=1.0, calm_length=4.0):
+        """
+        Initialize the ArrivalProcess.
+        :param rate: Mean arrival rate (requests per second) outside bursts.
+        :param rng: Random number generator.
+        :param kind: 'poisson' or 'bursty' (Poisson arrivals whose rate jumps by burst_factor during bursts).
+        :param burst_factor: Rate multiplier during a burst.
+        :param burst_length: Mean duration (in seconds) of a burst.
+        :param calm_length: Mean duration (in seconds) between bursts.
+        """
+        if kind not in ("poisson", "bursty"):
+            raise ValueError(f"Unknown arrival process: {kind}")
+        self.rate = rate
+        self.rng = rng
+        self.kind = kind
+        self.burst_factor = burst_factor
+        self.burst_length = burst_length
+        self.calm_length = calm_length
+        self.in_burst = False
+        self.phase_end = rng.expovariate(1.0 / calm_length) if kind == "bursty" else float("inf")
+
+    def next_arrival(self, now):
+        """
+        :return: Time of the next arrival after now.
+        """
+        while True:
+            rate = self.rate * self.burst_factor if self.in_burst else self.rate
+            candidate = now + self.rng.expovariate(rate)
+            if candidate < self.phase_end:
+                return candidate
+            # The phase ended before the next arrival; exponential gaps are memoryless, so resample from there
+            now = self.phase_end
+            self.in_burst = not self.in_burst
+            length = self.burst_length if self.in_burst else self.calm_length
+            self.phase_end = now + self.rng.expovariate(1.0 / length)
+
+
+class Fault:
+    def __init__(self, db_name, start, duration, slowdown=None):
+        """
+        Initialize the Fault.
+        :param db_name: Name of the affected backend.
+        :param start: Simulated time (in seconds) at which the fault begins.
+        :param duration: Duration of the fault in seconds.
+        :param slowdown: Service time multiplier; None means the backend fails completely.
+        """
+        self.db_name = db_name
+        self.start = start
+        self.duration = duration
+        self.slowdown = slowdown
+
+    @classmethod
+    def parse(cls, text, failure):
+        """
+        Parse 'name:start:duration' (failure) or 'name:start:duration:factor' (slowdown).
+        """
+        parts = text.split(":")
+        if failure and len(parts) == 3:
+            return cls(parts[0], float(parts[1]), float(parts[2]))
+        if not failure and len(parts) == 4:
+            return cls(parts[0], float(parts[1]), float(parts[2]), float(parts[3]))
+        raise ValueError(f"Invalid fault specification: {text}")
+
+
+class Backend:
+    def __init__(self, name, capacity, speed=1.0, max_queue=None):
+        """
+        Initialize the Backend.
+        :param name: Name of the simulated database.
+        :param capacity: Number of requests served at the same time.
+        :param speed: Relative speed; service times are divided by it.
+        :param max_queue: Requests that may wait for a free slot; None means unlimited.
+        """
+        self.name = name
+        self.config = {"Name": name}
+        self.capacity = capacity
+        self.speed = speed
+        self.max_queue = max_queue
+        self.slowdown = 1.0
+        self.up = True
+        self.busy = 0
+        self.queue = deque()
+        self.in_service = {}
+        self.busy_time = 0.0
+        self.last_change = 0.0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latencies = []
+
+    def account(self, now):
+        """Accumulate slot-seconds of work up to now."""
+        self.busy_time += self.busy * (now - self.last_change)
+        self.last_change = now
+
+
+class Simulator:
+    def __init__(self, strategy, backends, arrivals, service_time, requests=100000, faults=(),
+                 probe_interval=1.0):
+        """
+        Initialize the Simulator.
+        :param strategy: LoadBalancingStrategy instance under test.
+        :param backends: List of Backend objects.
+        :param arrivals: ArrivalProcess generating request times.
+        :param service_time: ServiceTime generator.
+        :param requests: Number of requests to simulate.
+        :param faults: Slowdowns and failures of backends.
+        :param probe_interval: Seconds between simulated health probes feeding update_load; None disables them.
+        """
+        self.strategy = strategy
+        self.backends = {backend.name: backend for backend in backends}
+        self.arrivals = arrivals
+        self.service_time = service_time
+        self.requests = requests
+        self.faults = list(faults)
+        self.probe_interval = probe_interval
+        self.events = []
+        self.sequence = 0
+        self.now = 0.0
+        self.latencies = []
+        self.unrouted = 0
+
+    def schedule(self, at, kind, payload=None):
+        # The sequence number keeps events at the same time in FIFO order and avoids comparing payloads
+        self.sequence += 1
+        heapq.heappush(self.events, (at, self.sequence, kind, payload))
+
+    def available_databases(self):
+        return [backend.config for backend in self.backends.values() if backend.up]
+
+    def run(self):
+        """
+        Run the simulation until all requests are finished.
+        :return: Report dictionary with latency percentiles and per-backend statistics.
+        """
+        started = time.perf_counter()
+        self.schedule(self.arrivals.next_arrival(0.0), ARRIVAL, 0)
+        for fault in self.faults:
+            if fault.db_name not in self.backends:
+                raise ValueError(f"Unknown backend in fault: {fault.db_name}")
+            self.schedule(fault.start, FAULT_START, fault)
+            self.schedule(fault.start + fault.duration, FAULT_END, fault)
+        if self.probe_interval and hasattr(self.strategy, "update_load"):
+            self.schedule(0.0, PROBE)
+
+        pending = self.requests
+        events = self.events
+        while events and pending:
+            self.now, _, kind, payload = heapq.heappop(events)
+            if kind == ARRIVAL:
+                if payload + 1 < self.requests:
+                    self.schedule(self.arrivals.next_arrival(self.now), ARRIVAL, payload + 1)
+                if not self.arrive():
+                    pending -= 1
+            elif kind == DEPARTURE:
+                if self.depart(*payload):
+                    pending -= 1
+            elif kind == PROBE:
+                self.probe()
+                self.schedule(self.now + self.probe_interval, PROBE)
+            elif kind == FAULT_START:
+                pending -= self.start_fault(payload)
+            else:
+                self.end_fault(payload)
+        return self.report(time.perf_counter() - started)
+
+    def arrive(self):
+        """
+        Route a new request.
+        :return: True if a backend accepted it.
+        """
+        db = self.strategy.select_database(self.available_databases())
+        if db is None:
+            self.unrouted += 1
+            return False
+        backend = self.backends[db["Name"]]
+        if backend.busy < backend.capacity:
+            self.start_service(backend, self.now)
+        elif backend.max_queue is None or len(backend.queue) < backend.max_queue:
+            backend.queue.append(self.now)
+        else:
+            backend.rejected += 1
+            self.release(backend)
+            return False
+        return True
+
+    def start_service(self, backend, arrived):
+        backend.account(self.now)
+        backend.busy += 1
+        self.sequence += 1
+        request_id = self.sequence
+        backend.in_service[request_id] = arrived
+        duration = self.service_time.sample() * backend.slowdown / backend.speed
+        self.schedule(self.now + duration, DEPARTURE, (backend.name, request_id))
+
+    def depart(self, db_name, request_id):
+        """
+        Finish a request.
+        :return: True if the request was still in service (it may have been lost to a failure).
+        """
+        backend = self.backends[db_name]
+        arrived = backend.in_service.pop(request_id, None)
+        if arrived is None:
+            return False
+        backend.account(self.now)
+        backend.busy -= 1
+        backend.completed += 1
+        latency = self.now - arrived
+        backend.latencies.append(latency)
+        self.latencies.append(latency)
+        self.release(backend)
+        if backend.queue:
+            self.start_service(backend, backend.queue.popleft())
+        return True
+
+    def release(self, backend):
+        if hasattr(self.strategy, "release_connection"):
+            self.strategy.release_connection(backend.name)
+
+    def probe(self):
+        """Report load signals the way the health checker does."""
+        for backend in self.backends.values():
+            if backend.up:
+                self.strategy.update_load(backend.name, {
+                    "active_backends": backend.busy + len(backend.queue),
+                    "connection_saturation": backend.busy / backend.capacity,
+                })
+
+    def start_fault(self, fault):
+        """
+        Apply a slowdown or take a backend down, failing the requests it holds.
+        :return: Number of requests lost.
+        """
+        backend = self.backends[fault.db_name]
+        if fault.slowdown is not None:
+            backend.slowdown = fault.slowdown
+            return 0
+        backend.account(self.now)
+        lost = len(backend.in_service) + len(backend.queue)
+        for _ in range(lost):
+            self.release(backend)
+        backend.failed += lost
+        backend.in_service.clear()
+        backend.queue.clear()
+        backend.busy = 0
+        backend.up = False
+        return lost
+
+    def end_fault(self, fault):
+        backend = self.backends[fault.db_name]
+        if fault.slowdown is not None:
+            backend.slowdown = 1.0
+        else:
+            backend.account(self.now)
+            backend.up = True
+
+    def report(self, wall_time):
+        elapsed = self.now or 1.0
+        report = {
+            "requests": self.requests,
+            "completed": len(self.latencies),
+            "unrouted": self.unrouted,
+            "simulated_seconds": self.now,
+            "wall_seconds": wall_time,
+            "latency": summarize(self.latencies),
+            "backends": {},
+        }
+        for backend in self.backends.values():
+            backend.account(self.now)
+            report["backends"][backend.name] = {
+                "completed": backend.completed,
+                "rejected": backend.rejected,
+                "failed": backend.failed,
+                "utilization": backend.busy_time / (backend.capacity * elapsed),
+                "latency": summarize(backend.latencies),
+            }
+        return report
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    summary = {f"p{p}": percentile(values, p) for p in (50, 90, 99, 99.9)}
+    summary["mean"] = sum(values) / len(values) if values else 0.0
+    summary["max"] = values[-1] if values else 0.0
+    return summary
+
+
+def format_summary(summary):
+    return " ".join(f"{key}={value * 1000:.2f}ms" for key, value in summary.items())
+
+
+def print_report(strategy_type, report):
+    print(f"\n--- {strategy_type} ---")
+    print(f"Completed {report['completed']}/{report['requests']} requests "
+          f"({report['unrouted']} unrouted) in {report['simulated_seconds']:.1f} simulated seconds "
+          f"({report['wall_seconds']:.2f}s wall, {report['requests'] / max(report['wall_seconds'], 1e-9):.0f} req/s)")
+    print(f"Latency: {format_summary(report['latency'])}")
+    for name, stats in report["backends"].items():
+        print(f"  {name:<6} util={100 * stats['utilization']:5.1f}% completed={stats['completed']:<8d} "
+              f"rejected={stats['rejected']:<6d} failed={stats['failed']:<6d} "
+              f"p99={stats['latency']['p99'] * 1000:.2f}ms")
+
+
+def build_backends(count, capacities, speeds, max_queue):
+    capacities = capacities or [4]
+    speeds = speeds or [1.0]
+    return [Backend(f"db{i + 1}", capacities[i % len(capacities)], speeds[i % len(speeds)], max_queue)
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare load balancing strategies on simulated backends.")
+    parser.add_argument("--strategy", nargs="+", default=["round_robin", "random", "least_connections"],
+                        help="Strategies to simulate, each with the same seed.")
+    parser.add_argument("--requests", type=int, default=1000000, help="Number of simulated requests.")
+    parser.add_argument("--rate", type=float, default=1000, help="Mean arrival rate (requests per second).")
+    parser.add_argument("--arrival", choices=("poisson", "bursty"), default="poisson", help="Arrival process.")
+    parser.add_argument("--burst-factor", type=float, default=5.0, help="Rate multiplier during bursts.")
+    parser.add_argument("--burst-length", type=float, default=1.0, help="Mean burst duration in seconds.")
+    parser.add_argument("--calm-length", type=float, default=4.0, help="Mean time between bursts in seconds.")
+    parser.add_argument("--backends", type=int, default=4, help="Number of simulated databases.")
+    parser.add_argument("--capacity", type=int, nargs="+", default=None,
+                        help="Concurrent requests per backend (cycled over backends).")
+    parser.add_argument("--speed", type=float, nargs="+", default=None,
+                        help="Relative speed per backend (cycled over backends).")
+    parser.add_argument("--max-queue", type=int, default=None, help="Waiting requests per backend before rejecting.")
+    parser.add_argument("--service", choices=SERVICE_DISTRIBUTIONS, default="exponential",
+                        help="Service time distribution.")
+    parser.add_argument("--service-mean", type=float, default=0.003, help="Mean service time in seconds.")
+    parser.add_argument("--slowdown", action="append", default=[],
+                        help="Slow a backend down: name:start:duration:factor (repeatable).")
+    parser.add_argument("--failure", action="append", default=[],
+                        help="Take a backend down: name:start:duration (repeatable).")
+    parser.add_argument("--probe-interval", type=float, default=1.0, help="Seconds between simulated probes.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random number generator.")
+    args = parser.parse_args()
+
+    SingletonLogger().get_logger().setLevel(logging.WARNING)
+    faults = [Fault.parse(text, failure=False) for text in args.slowdown]
+    faults += [Fault.parse(text, failure=True) for text in args.failure]
+
+    for strategy_type in args.strategy:
+        # Separate generators keep arrivals identical across strategies; random strategies draw from the global one
+        random.seed(args.seed)
+        simulator = Simulator(
+            LoadBalancingStrategyFactory.create_strategy(strategy_type),
+            build_backends(args.backends, args.capacity, args.speed, args.max_queue),
+            ArrivalProcess(args.rate, random.Random(args.seed), args.arrival, args.burst_factor,
+                           args.burst_length, args.calm_length),
+            ServiceTime(args.service, args.service_mean, random.Random(args.seed + 1)),
+            args.requests, faults, args.probe_interval)
+        print_report(strategy_type, simulator.run())
+
+
+if __name__ == "__main__":
+    main()
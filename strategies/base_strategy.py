@@ -10,4 +10,15 @@ class LoadBalancingStrategy(ABC):
         :return: Selected database configuration.
         """
         pass
-    
\ No newline at end of file
+
+    def select_many(self, databases, n):
+        """
+        Select databases for a batch of n queries.
+        Strategies that can plan the whole batch at once override this method.
+        :param databases: List of database configurations.
+        :param n: Number of queries in the batch.
+        :return: List of n selected database configurations (empty if there are no databases).
+        """
+        if not databases:
+            return []
+        return [self.select_database(databases) for _ in range(n)]
@@ -0,0 +1,83 @@
+from strategies.base_strategy import LoadBalancingStrategy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class LeastLoadedStrategy(LoadBalancingStrategy):
+    def __init__(self, saturation_limit=0.9):
+        """
+        Select the database with the lowest load reported by the health probes.
+        :param saturation_limit: Connection saturation above which a database is used only as a last resort.
+        """
+        self.saturation_limit = saturation_limit
+        self.loads = {}
+        self.routed_since_sample = {}
+
+    def update_load(self, db_name, load):
+        """
+        Store the latest load signals of a database. Queries routed before the sample are already
+        part of its active backends, so the count of queries routed since the last sample starts over.
+        """
+        self.loads[db_name] = load
+        self.routed_since_sample[db_name] = 0
+
+    def score(self, db_name):
+        """
+        Return a sort key for a database: hot databases last, then by the active backends
+        sampled by the probe plus the queries this strategy has routed since that sample.
+        """
+        load = self.loads.get(db_name, {})
+        saturated = load.get("connection_saturation", 0.0) >= self.saturation_limit
+        return saturated, load.get("active_backends", 0) + self.routed_since_sample.get(db_name, 0)
+
+    def select_database(self, databases):
+        if not databases:
+            return None
+
+        selected_db = min(databases, key=lambda db: self.score(db['Name']))
+        self.routed_since_sample[selected_db['Name']] = self.routed_since_sample.get(selected_db['Name'], 0) + 1
+        return selected_db
+
+    def select_many(self, databases, n):
+        """
+        Spread a batch over the least loaded databases by water-filling: every query goes to the database
+        whose load is the lowest so far, the same result as n calls of select_database in one vectorized step.
+        Like select_database, ties go to the database listed first.
+        """
+        if not databases or np is None:
+            return super().select_many(databases, n)
+
+        scores = [self.score(db['Name']) for db in databases]
+        candidates = [index for index, (saturated, _) in enumerate(scores) if not saturated]
+        if not candidates:
+            candidates = list(range(len(databases)))
+        loads = np.array([scores[index][1] for index in candidates], dtype=float)
+
+        order = np.argsort(loads, kind="stable")
+        sorted_loads = loads[order]
+        prefix = np.cumsum(sorted_loads)
+        # Queries needed to raise the k least loaded databases to the load of the k-th one
+        needed = np.arange(1, len(sorted_loads) + 1) * sorted_loads - prefix
+        filled = int(np.searchsorted(needed, n, side="right"))
+        level = (n + prefix[filled - 1]) / filled
+
+        counts = np.zeros(len(loads), dtype=int)
+        counts[order[:filled]] = np.floor(level - sorted_loads[:filled]).astype(int)
+        # The filled databases are now level with each other; the rest goes to them in the order they are listed
+        counts[np.sort(order[:filled])[:n - int(counts.sum())]] += 1
+
+        selected = []
+        for index, count in zip(candidates, counts.tolist()):
+            if count:
+                db = databases[index]
+                self.routed_since_sample[db['Name']] = self.routed_since_sample.get(db['Name'], 0) + count
+                selected.extend([db] * count)
+        return selected
+
+    def release_connection(self, db_name):
+        """A query routed since the last sample has finished and no longer adds to the load."""
+        if self.routed_since_sample.get(db_name, 0) > 0:
+            self.routed_since_sample[db_name] -= 1
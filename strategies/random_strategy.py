@@ -1,9 +1,24 @@
 import random
 from strategies.base_strategy import LoadBalancingStrategy
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class RandomStrategy(LoadBalancingStrategy):
+    def __init__(self):
+        self.rng = np.random.default_rng() if np is not None else None
+
     def select_database(self, databases):
         if not databases:
             return None
         return random.choice(databases)
+
+    def select_many(self, databases, n):
+        if not databases:
+            return []
+        if np is None:
+            return random.choices(databases, k=n)
+        return [databases[index] for index in self.rng.integers(len(databases), size=n).tolist()]
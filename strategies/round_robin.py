@@ -8,6 +8,8 @@ class RoundRobinStrategy(LoadBalancingStrategy):
     def select_database(self, databases):
         if not databases:
             return None
+        # The list may shrink between calls (unhealthy or saturated databases)
+        self.index %= len(databases)
         server = databases[self.index]
         self.index = (self.index + 1) % len(databases)
         return server
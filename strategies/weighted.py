@@ -0,0 +1,43 @@
+import random
+from strategies.base_strategy import LoadBalancingStrategy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class WeightedStrategy(LoadBalancingStrategy):
+    def __init__(self, default_weight=1.0):
+        """
+        Select databases at random in proportion to their "Weight" in the configuration.
+        :param default_weight: Weight of databases without a "Weight" entry.
+        """
+        self.default_weight = default_weight
+        self.rng = np.random.default_rng() if np is not None else None
+
+    def weights(self, databases):
+        """
+        :return: List with the weight of every database.
+        :raises ValueError: If a weight is negative or all weights are zero.
+        """
+        weights = [float(db.get("Weight", self.default_weight)) for db in databases]
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Database weights must not be negative.")
+        if databases and not any(weights):
+            raise ValueError("At least one database weight must be positive.")
+        return weights
+
+    def select_database(self, databases):
+        if not databases:
+            return None
+        return random.choices(databases, weights=self.weights(databases))[0]
+
+    def select_many(self, databases, n):
+        if not databases:
+            return []
+        if np is None:
+            return random.choices(databases, weights=self.weights(databases), k=n)
+        weights = np.asarray(self.weights(databases))
+        indices = self.rng.choice(len(databases), size=n, p=weights / weights.sum())
+        return [databases[index] for index in indices.tolist()]
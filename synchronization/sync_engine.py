@@ -0,0 +1,148 @@
+import time
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from logger.singleton_logger import SingletonLogger
+
+
+class SyncEngine:
+    TABLES_QUERY = """
+    SELECT c.relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p') AND NOT c.relispartition AND n.nspname = current_schema()
+    ORDER BY c.relname;
+    """
+    PRIMARY_KEYS_QUERY = """
+    SELECT c.relname, array_agg(a.attname::text ORDER BY array_position(i.indkey::int2[], a.attnum))
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = ANY(i.indkey)
+    WHERE i.indisprimary AND n.nspname = current_schema()
+    GROUP BY c.relname;
+    """
+    FOREIGN_KEYS_QUERY = """
+    SELECT DISTINCT child.relname, parent.relname
+    FROM pg_constraint con
+    JOIN pg_class child ON child.oid = con.conrelid
+    JOIN pg_class parent ON parent.oid = con.confrelid
+    JOIN pg_namespace n ON n.oid = child.relnamespace
+    WHERE con.contype = 'f' AND n.nspname = current_schema();
+    """
+
+    def __init__(self, load_balancer, max_workers=4):
+        """
+        Initialize the SyncEngine.
+        :param load_balancer: LoadBalancer whose databases are synchronized.
+        :param max_workers: Number of tables synchronized at the same time.
+        """
+        self.load_balancer = load_balancer
+        self.max_workers = max_workers
+        self.logger = SingletonLogger().get_logger()
+
+    def discover_schema(self):
+        """
+        Read user tables, their primary keys and foreign-key dependencies from the catalog
+        of the first reachable active database.
+        :return: Tuple (tables, primary_keys, dependencies) where dependencies maps a table to the set
+                 of tables it references, or None if no database could be queried.
+        """
+        for db in list(self.load_balancer.active_databases):
+            conn_str = self.load_balancer._parse_connection_string(db["ConnectionString"])
+            conn = None
+            try:
+                conn = psycopg2.connect(**conn_str)
+                with conn.cursor() as cursor:
+                    cursor.execute(self.TABLES_QUERY)
+                    tables = [row[0] for row in cursor.fetchall()]
+                    cursor.execute(self.PRIMARY_KEYS_QUERY)
+                    primary_keys = {table: list(columns) for table, columns in cursor.fetchall()}
+                    cursor.execute(self.FOREIGN_KEYS_QUERY)
+                    dependencies = {table: set() for table in tables}
+                    for child, parent in cursor.fetchall():
+                        if child in dependencies and parent in dependencies and child != parent:
+                            dependencies[child].add(parent)
+                return tables, primary_keys, dependencies
+            except psycopg2.Error as e:
+                self.logger.warning(f"Error discovering schema in database '{db['Name']}': {e}")
+            finally:
+                if conn:
+                    conn.close()
+        return None
+
+    def order_tables(self, dependencies):
+        """
+        Group tables into layers so that every table comes after the tables it references.
+        Tables within a layer do not depend on each other and can be synchronized in parallel.
+        :param dependencies: Dictionary mapping a table to the set of tables it references.
+        :return: List of layers (sorted lists of table names).
+        """
+        remaining = {table: set(parents) for table, parents in dependencies.items()}
+        layers = []
+        while remaining:
+            layer = sorted(table for table, parents in remaining.items() if not parents)
+            if not layer:
+                # A foreign-key cycle: synchronize the rest together, triggers are disabled anyway
+                layer = sorted(remaining)
+                self.logger.warning(f"Foreign-key cycle between tables: {', '.join(layer)}.")
+            layers.append(layer)
+            for table in layer:
+                del remaining[table]
+            for parents in remaining.values():
+                parents.difference_update(layer)
+        return layers
+
+    def synchronize_all(self, target_databases=None, max_rows_per_second=None):
+        """
+        Synchronize every user table, layer by layer in foreign-key order, with independent tables
+        synchronized in parallel.
+        :param target_databases: Databases to bring up to date; defaults to all active databases.
+        :param max_rows_per_second: Limit of rows copied per second for each table.
+        :return: List of per-table reports, or None if the schema could not be discovered.
+        """
+        schema = self.discover_schema()
+        if schema is None:
+            self.logger.warning("Could not discover tables to synchronize.")
+            return None
+        tables, primary_keys, dependencies = schema
+
+        started = time.monotonic()
+        reports = []
+        for layer in self.order_tables(dependencies):
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(layer))) as executor:
+                reports.extend(executor.map(
+                    lambda table: self.synchronize_table(
+                        table, primary_keys.get(table, []), target_databases, max_rows_per_second),
+                    layer))
+
+        self.log_reports(reports, time.monotonic() - started)
+        return reports
+
+    def synchronize_table(self, table, key_columns, target_databases=None, max_rows_per_second=None):
+        """
+        Synchronize a single table and measure how long it took.
+        :return: Dictionary with the table name, status, duration and the synchronization report.
+        """
+        started = time.monotonic()
+        try:
+            result = self.load_balancer.synchronize_tables(
+                table, target_databases=target_databases, max_rows_per_second=max_rows_per_second,
+                key_columns=key_columns, disable_triggers=True)
+        except Exception as e:
+            self.logger.error(f"Error synchronizing table '{table}': {e}")
+            result = None
+        report = {"table": table, "seconds": time.monotonic() - started}
+        if result is None:
+            report.update({"status": "failed", "source": None, "synchronized": [], "failed": [], "rows": 0})
+        else:
+            report.update(result)
+            report["status"] = "failed" if result["failed"] else "ok"
+        return report
+
+    def log_reports(self, reports, elapsed):
+        for report in reports:
+            self.logger.info(
+                f"Table '{report['table']}': {report['status']}, {report['rows']} rows copied to "
+                f"{len(report['synchronized'])} databases in {report['seconds']:.2f}s.")
+        total_rows = sum(report["rows"] for report in reports)
+        self.logger.info(f"Synchronized {len(reports)} tables ({total_rows} rows) in {elapsed:.2f}s.")
@@ -0,0 +1,180 @@
+import contextvars
+import json
+import random
+import time
+from collections import deque
+from threading import Lock
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id():
+    return f"{random.getrandbits(64):016x}"
+
+
+class Span:
+    def __init__(self, tracer, name, parent, attributes):
+        """
+        Initialize the Span.
+        :param tracer: Tracer exporting the span when it ends.
+        :param name: Name of the traced phase.
+        :param parent: Enclosing span, or None for the root span of a trace.
+        :param attributes: Dictionary of attributes describing the phase.
+        """
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.error = None
+        self.start_time = None
+        self.duration = None
+        self._started = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.duration = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.sink.export(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    enabled = True
+
+    def __init__(self, sink):
+        """
+        Initialize the Tracer.
+        :param sink: Object with an export(span) method receiving every finished span.
+        """
+        self.sink = sink
+
+    def span(self, name, **attributes):
+        """
+        Start a span as a child of the current span of this thread or task.
+        :return: Span used as a context manager.
+        """
+        return Span(self, name, _current_span.get(), attributes)
+
+    def child_span(self, name, **attributes):
+        """
+        Start a span only inside a traced request. Helpers also called from background threads
+        (recovery, startup) use it, so they do not start traces of their own.
+        :return: Span, or a no-op span if there is no current span.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return NoopTracer._span
+        return Span(self, name, parent, attributes)
+
+    def wrap(self, function):
+        """
+        Bind a function to the current span so that spans it opens in another thread
+        (e.g. a ThreadPoolExecutor worker) join the same trace.
+        """
+        context = contextvars.copy_context()
+        return lambda *args, **kwargs: context.copy().run(function, *args, **kwargs)
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+class NoopTracer:
+    """
+    Tracer used when tracing is disabled: spans cost one method call and record nothing.
+    """
+    enabled = False
+    _span = _NoopSpan()
+
+    def span(self, name, **attributes):
+        return self._span
+
+    def child_span(self, name, **attributes):
+        return self._span
+
+    def wrap(self, function):
+        return function
+
+
+NOOP_TRACER = NoopTracer()
+
+
+class RingBufferSink:
+    def __init__(self, capacity=10000):
+        """
+        Keep the most recent spans in memory.
+        :param capacity: Number of spans kept; older ones are discarded.
+        """
+        self.buffer = deque(maxlen=capacity)
+        self.lock = Lock()
+
+    def export(self, span):
+        with self.lock:
+            self.buffer.append(span)
+
+    def spans(self, trace_id=None):
+        with self.lock:
+            spans = list(self.buffer)
+        return [span for span in spans if trace_id is None or span.trace_id == trace_id]
+
+    def breakdown(self, trace_id):
+        """
+        Sum the time spent in every phase of a trace.
+        :return: Dictionary mapping span names to their total duration in seconds.
+        """
+        totals = {}
+        for span in self.spans(trace_id):
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return totals
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        """
+        Append every span as one JSON object per line.
+        :param path: Path of the output file.
+        """
+        self.file = open(path, "a")
+        self.lock = Lock()
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
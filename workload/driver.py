@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import math
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from loadbalancer import LoadBalancer
+from logger.singleton_logger import SingletonLogger
+from observer.health_checker import HealthChecker
+from workload.statistics import percentile
+
+OPERATIONS = ("read", "insert", "update", "delete")
+
+
+class KeyChooser:
+    def __init__(self, key_space, distribution="uniform", zipf_s=1.1, rng=None):
+        """
+        Initialize the KeyChooser.
+        :param key_space: Keys are drawn from 1..key_space.
+        :param distribution: 'uniform' or 'zipfian'.
+        :param zipf_s: Skew of the zipfian distribution; key 1 is the hottest.
+        :param rng: Random number generator.
+        """
+        self.key_space = key_space
+        self.distribution = distribution
+        self.rng = rng or random.Random()
+        if distribution == "zipfian":
+            weights = [1.0 / math.pow(rank, zipf_s) for rank in range(1, key_space + 1)]
+            total = sum(weights)
+            cumulative = 0.0
+            self.cdf = []
+            for weight in weights:
+                cumulative += weight / total
+                self.cdf.append(cumulative)
+        elif distribution != "uniform":
+            raise ValueError(f"Unknown key distribution: {distribution}")
+
+    def next_key(self):
+        if self.distribution == "uniform":
+            return self.rng.randint(1, self.key_space)
+        return min(bisect.bisect_left(self.cdf, self.rng.random()), self.key_space - 1) + 1
+
+
+class CountingStrategy:
+    """
+    Wrap a strategy to count which database every read was routed to.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.counts = {}
+        self.lock = Lock()
+
+    def select_database(self, databases):
+        selected = self.strategy.select_database(databases)
+        if selected:
+            with self.lock:
+                self.counts[selected["Name"]] = self.counts.get(selected["Name"], 0) + 1
+        return selected
+
+    def __getattr__(self, name):
+        return getattr(self.strategy, name)
+
+
+class StatsRecorder:
+    def __init__(self):
+        self.lock = Lock()
+        self.latencies = {operation: [] for operation in OPERATIONS}
+        self.errors = {operation: 0 for operation in OPERATIONS}
+        self.interval_latencies = []
+        self.interval_errors = 0
+
+    def record(self, operation, latency, success):
+        with self.lock:
+            self.latencies[operation].append(latency)
+            self.interval_latencies.append(latency)
+            if not success:
+                self.errors[operation] += 1
+                self.interval_errors += 1
+
+    def take_interval(self):
+        with self.lock:
+            latencies, errors = self.interval_latencies, self.interval_errors
+            self.interval_latencies, self.interval_errors = [], 0
+        return latencies, errors
+
+
+def format_latencies(latencies):
+    values = sorted(latencies)
+    return (f"p50={percentile(values, 50) * 1000:.2f}ms p95={percentile(values, 95) * 1000:.2f}ms "
+            f"p99={percentile(values, 99) * 1000:.2f}ms max={(values[-1] if values else 0) * 1000:.2f}ms")
+
+
+class WorkloadDriver:
+    def __init__(self, load_balancer, table_name, ratios, key_chooser, rate, duration, concurrency=8,
+                 mode="threads", report_interval=5.0, rng=None):
+        """
+        Initialize the WorkloadDriver.
+        :param load_balancer: LoadBalancer receiving the generated queries.
+        :param table_name: Table with (id, name, email) columns, like the one used by main.py.
+        :param ratios: Dictionary mapping operation ('read', 'insert', 'update', 'delete') to its weight.
+        :param key_chooser: KeyChooser picking ids for reads, updates and deletes.
+        :param rate: Target number of operations per second (open loop).
+        :param duration: Duration of the run in seconds.
+        :param concurrency: Number of operations executed at the same time.
+        :param mode: 'threads' or 'asyncio'.
+        :param report_interval: Time (in seconds) between live reports.
+        """
+        if mode not in ("threads", "asyncio"):
+            raise ValueError(f"Unknown concurrency mode: {mode}")
+        self.load_balancer = load_balancer
+        self.table_name = table_name
+        self.operations = [operation for operation in OPERATIONS if ratios.get(operation, 0) > 0]
+        self.weights = [ratios[operation] for operation in self.operations]
+        if not self.operations:
+            raise ValueError("At least one operation ratio must be positive.")
+        self.key_chooser = key_chooser
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.mode = mode
+        self.report_interval = report_interval
+        self.rng = rng or random.Random()
+        self.stats = StatsRecorder()
+        self.strategy = CountingStrategy(load_balancer.strategy)
+        self.load_balancer.strategy = self.strategy
+
+    # ---- Operations modeled on the main.py menu ----
+
+    def run_operation(self, operation, key):
+        if operation == "read":
+            result = self.load_balancer.execute_select(f"SELECT * FROM {self.table_name} WHERE id = %s;", (key,))
+            return result is not None
+        if operation == "insert":
+            chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+            name = " ".join(["".join(self.rng.choices(chars, k=5)).capitalize() for _ in range(2)])
+            email = f"{name.split()[0].lower()}.{uuid.uuid4().hex[:12]}@example.com"
+            query = f"INSERT INTO {self.table_name} (name, email) VALUES (%s, %s);"
+            return self.load_balancer.execute_non_select_query(query, (name, email)) is not None
+        if operation == "update":
+            name = f"Updated {uuid.uuid4().hex[:6].capitalize()}"
+            query = f"UPDATE {self.table_name} SET name = %s WHERE id = %s;"
+            return self.load_balancer.execute_non_select_query(query, (name, key)) is not None
+        query = f"DELETE FROM {self.table_name} WHERE id = %s;"
+        return self.load_balancer.execute_non_select_query(query, (key,)) is not None
+
+    def timed_operation(self, operation, key, intended_start):
+        """
+        Run an operation and record its latency measured from its scheduled start,
+        so time spent waiting for a free worker is included.
+        """
+        try:
+            success = self.run_operation(operation, key)
+        except Exception as e:
+            SingletonLogger().get_logger().error(f"Workload operation {operation} failed: {e}")
+            success = False
+        self.stats.record(operation, time.monotonic() - intended_start, success)
+
+    def next_operation(self):
+        return self.rng.choices(self.operations, weights=self.weights)[0], self.key_chooser.next_key()
+
+    # ---- Scheduling ----
+
+    def run(self):
+        started = time.monotonic()
+        if self.mode == "threads":
+            self._run_threads(started)
+        else:
+            asyncio.run(self._run_asyncio(started))
+        elapsed = time.monotonic() - started
+        self.print_final_report(elapsed)
+
+    def _run_threads(self, started):
+        interval = 1.0 / self.rate
+        next_report = started + self.report_interval
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            index = 0
+            while True:
+                intended_start = started + index * interval
+                if intended_start - started >= self.duration:
+                    break
+                now = time.monotonic()
+                if now >= next_report:
+                    self.print_live_report(now - started)
+                    next_report += self.report_interval
+                if intended_start > now:
+                    time.sleep(min(intended_start, next_report) - now)
+                    continue
+                operation, key = self.next_operation()
+                executor.submit(self.timed_operation, operation, key, intended_start)
+                index += 1
+
+    async def _run_asyncio(self, started):
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        interval = 1.0 / self.rate
+        tasks = set()
+
+        async def launch(operation, key, intended_start):
+            async with semaphore:
+                await loop.run_in_executor(executor, self.timed_operation, operation, key, intended_start)
+
+        async def report():
+            while True:
+                await asyncio.sleep(self.report_interval)
+                self.print_live_report(time.monotonic() - started)
+
+        reporter = asyncio.create_task(report())
+        index = 0
+        while True:
+            intended_start = started + index * interval
+            if intended_start - started >= self.duration:
+                break
+            delay = intended_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(launch(*self.next_operation(), intended_start))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+        if tasks:
+            await asyncio.gather(*tasks)
+        reporter.cancel()
+        executor.shutdown()
+
+    # ---- Reporting ----
+
+    def print_live_report(self, elapsed):
+        latencies, errors = self.stats.take_interval()
+        throughput = len(latencies) / self.report_interval
+        print(f"[{elapsed:7.1f}s] {throughput:9.1f} ops/s  errors={errors:<5d} {format_latencies(latencies)}")
+
+    def print_final_report(self, elapsed):
+        print("\n--- Workload summary ---")
+        print(f"Duration: {elapsed:.1f}s, target rate: {self.rate} ops/s, "
+              f"concurrency: {self.concurrency} ({self.mode})")
+        all_latencies = []
+        for operation in OPERATIONS:
+            latencies = self.stats.latencies[operation]
+            if not latencies:
+                continue
+            all_latencies.extend(latencies)
+            print(f"{operation:<7} count={len(latencies):<8d} errors={self.stats.errors[operation]:<6d} "
+                  f"{len(latencies) / elapsed:9.1f} ops/s  {format_latencies(latencies)}")
+        print(f"{'total':<7} count={len(all_latencies):<8d} errors={sum(self.stats.errors.values()):<6d} "
+              f"{len(all_latencies) / elapsed:9.1f} ops/s  {format_latencies(all_latencies)}")
+
+        total_reads = sum(self.strategy.counts.values())
+        if total_reads:
+            print("\nRead distribution per database:")
+            for db_name, count in sorted(self.strategy.counts.items()):
+                print(f"  {db_name:<10} {count:<8d} {100.0 * count / total_reads:5.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate sustained load through the load balancer.")
+    parser.add_argument("--config", default="Connection/db.json", help="Database configuration file.")
+    parser.add_argument("--table", default="users", help="Table with (id, name, email) columns.")
+    parser.add_argument("--strategy", default="round_robin", help="Load balancing strategy for reads.")
+    parser.add_argument("--read", type=float, default=70, help="Weight of SELECT by id.")
+    parser.add_argument("--insert", type=float, default=15, help="Weight of INSERT of a random user.")
+    parser.add_argument("--update", type=float, default=10, help="Weight of UPDATE by id.")
+    parser.add_argument("--delete", type=float, default=5, help="Weight of DELETE by id.")
+    parser.add_argument("--rate", type=float, default=100, help="Target operations per second (open loop).")
+    parser.add_argument("--duration", type=float, default=60, help="Duration of the run in seconds.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Operations executed at the same time.")
+    parser.add_argument("--mode", choices=("threads", "asyncio"), default="threads", help="Concurrency model.")
+    parser.add_argument("--distribution", choices=("uniform", "zipfian"), default="uniform",
+                        help="Distribution of ids for reads, updates and deletes.")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Skew of the zipfian distribution.")
+    parser.add_argument("--key-space", type=int, default=10000, help="Ids are drawn from 1..key-space.")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="Seconds between live reports.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random number generator.")
+    parser.add_argument("--log-level", default="WARNING", help="Level of the load balancer logger.")
+    args = parser.parse_args()
+
+    SingletonLogger().get_logger().setLevel(getattr(logging, args.log_level.upper()))
+    rng = random.Random(args.seed)
+
+    load_balancer = LoadBalancer(args.config, args.table, strategy_type=args.strategy)
+    with open(args.config, "r") as file:
+        databases = json.load(file)
+    health_checker = HealthChecker(databases, check_interval=15)
+    health_checker.add_observer(load_balancer)
+    health_checker.check_health()
+
+    ratios = {"read": args.read, "insert": args.insert, "update": args.update, "delete": args.delete}
+    key_chooser = KeyChooser(args.key_space, args.distribution, args.zipf_s, rng)
+    driver = WorkloadDriver(load_balancer, args.table, ratios, key_chooser, args.rate, args.duration,
+                            args.concurrency, args.mode, args.report_interval, rng)
+    try:
+        driver.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
+    finally:
+        health_checker.stop()
+
+
+if __name__ == "__main__":
+    main()
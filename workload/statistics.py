@@ -0,0 +1,12 @@
+import math
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of already sorted values.
+    :return: The value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percent / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]